@@ -0,0 +1,412 @@
+"""
+Load benchmark for the routes of the app built by main.create_app().
+
+Seeds a synthetic fleet, then drives every scenario in-process through an
+ASGI client with a fixed number of concurrent clients, and writes throughput
+and latency percentiles as JSON:
+
+    python -m benchmarks.run --database-url sqlite:///bench.db --profile 1k \\
+        --output bench.json
+    python -m benchmarks.run --database-url postgresql://... --profile 100k \\
+        --baseline bench.json --max-regression 0.10
+
+Admission control is off unless --admission is given, so the run measures
+the routes rather than how fast the limiters shed them. Latency percentiles
+cover the answered (non-5xx) requests only, and the run exits non-zero when
+any request gets a 5xx. With --baseline it also exits non-zero when any
+scenario's p95 latency or throughput is more than --max-regression worse than
+the saved results. Scenarios that rely on Postgres-only SQL are skipped on
+SQLite.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Callable
+
+from sqlalchemy import create_engine
+
+from benchmarks.seed import CITIES, DAYS, FIRST_DAY, MAKES, SERVICE_TYPES, \
+    add_size_arguments, license_plate, seed, sizes_from_arguments
+
+BULK_SIZE = 50
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    # Builds (path, params, json body) from the random generator and fleet sizes.
+    request: Callable[[random.Random, dict], tuple[str, dict, dict | None]] | None = None
+    postgres_only: bool = False
+    # Instead of request, for scenarios whose requests use up rows (deletes):
+    # an async (client, rng, fleet, count) -> [(path, params, json body)] that
+    # creates those rows through the API before the timed run.
+    setup: Callable | None = None
+
+
+def _day(rng: random.Random, fleet: dict, span: int = 0) -> date:
+    first_day = date.fromisoformat(fleet["firstDay"])
+    return first_day + timedelta(days=rng.randrange(fleet["days"] - span))
+
+
+def _daily_report(rng, fleet):
+    start = _day(rng, fleet, span=30)
+    return "/garages/dailyAvailabilityReport", {
+        "garageId": rng.randint(1, fleet["garages"]),
+        "startDate": start.isoformat(),
+        "endDate": (start + timedelta(days=29)).isoformat(),
+    }, None
+
+
+def _monthly_report(rng, fleet):
+    start = _day(rng, fleet, span=365)
+    end = start + timedelta(days=300)
+    return "/maintenance/monthlyRequestsReport", {
+        "garageId": rng.randint(1, fleet["garages"]),
+        "startMonth": start.strftime("%Y-%m"),
+        "endMonth": end.strftime("%Y-%m"),
+    }, None
+
+
+def _availability_matrix(rng, fleet):
+    start = _day(rng, fleet, span=30)
+    return "/garages/availabilityMatrix", {
+        "city": rng.choice(CITIES),
+        "startDate": start.isoformat(),
+        "endDate": (start + timedelta(days=29)).isoformat(),
+    }, None
+
+
+def _next_available(rng, fleet):
+    return "/maintenance/nextAvailable", {
+        "city": rng.choice(CITIES),
+        "from": _day(rng, fleet, span=30).isoformat(),
+    }, None
+
+
+def _export(rng, fleet):
+    start = _day(rng, fleet, span=90)
+    return "/maintenance/export", {
+        "garageId": rng.randint(1, fleet["garages"]),
+        "startDate": start.isoformat(),
+        "endDate": (start + timedelta(days=89)).isoformat(),
+    }, None
+
+
+def _search_cars(rng, fleet):
+    make = rng.choice(list(MAKES))
+    term = rng.choice([make[:3], f"{make} {rng.choice(MAKES[make])[:2]}",
+                       license_plate(rng.randint(1, fleet["cars"]))[:6]])
+    return "/cars/search", {"q": term}, None
+
+
+def _garage_body(rng, fleet):
+    return {
+        "name": "Benchmark garage",
+        "location": f"{rng.randint(1, 200)} Main Street",
+        "city": rng.choice(CITIES),
+        "capacity": rng.randint(5, 50),
+    }
+
+
+def _car_body(rng, fleet, plate=None):
+    make = rng.choice(list(MAKES))
+    return {
+        "make": make,
+        "model": rng.choice(MAKES[make]),
+        "productionYear": rng.randint(1995, 2025),
+        # Created plates have to be unique across runs on the same database.
+        "licensePlate": plate or f"BE{uuid.uuid4().hex[:10].upper()}",
+        "garageIds": rng.sample(range(1, fleet["garages"] + 1), min(2, fleet["garages"])),
+    }
+
+
+def _maintenance_body(rng, fleet):
+    return {
+        "garageId": rng.randint(1, fleet["garages"]),
+        "carId": rng.randint(1, fleet["cars"]),
+        "serviceType": rng.choice(SERVICE_TYPES),
+        "scheduledDate": _day(rng, fleet).isoformat(),
+    }
+
+
+def _create_maintenance(rng, fleet):
+    return "/maintenance", {}, _maintenance_body(rng, fleet)
+
+
+def _update_maintenance(rng, fleet):
+    return (f"/maintenance/{rng.randint(1, fleet['maintenances'])}", {},
+            _maintenance_body(rng, fleet))
+
+
+def _create_maintenances_bulk(rng, fleet):
+    return "/maintenance/bulk", {}, [_maintenance_body(rng, fleet)
+                                     for _ in range(BULK_SIZE)]
+
+
+def _update_car(rng, fleet):
+    car_id = rng.randint(1, fleet["cars"])
+    # The car keeps its seeded plate, so updates never collide on it.
+    return f"/cars/{car_id}", {}, _car_body(rng, fleet, plate=license_plate(car_id))
+
+
+def _create_cars_bulk(rng, fleet):
+    return "/cars/bulk", {}, [_car_body(rng, fleet) for _ in range(BULK_SIZE)]
+
+
+def _update_garage(rng, fleet):
+    return (f"/garages/{rng.randint(1, fleet['garages'])}", {},
+            _garage_body(rng, fleet))
+
+
+def _deleting(path: str, body: Callable[[random.Random, dict], dict]):
+    """
+    Setup for a DELETE scenario: POSTs one row per request to path and plans
+    a DELETE of each, so the seeded fleet is left as it was.
+    """
+    async def setup(client, rng, fleet, count):
+        ids = []
+        while len(ids) < count:
+            response = await client.post(path, json=body(rng, fleet))
+            # A maintenance can land on a fully booked day; try another one.
+            if response.status_code == 409:
+                continue
+            response.raise_for_status()
+            ids.append(response.json()["id"])
+        return [(f"{path}/{row_id}", {}, None) for row_id in ids]
+    return setup
+
+
+SCENARIOS = [
+    Scenario("GET /cars", "GET", lambda rng, fleet: ("/cars", {}, None)),
+    Scenario("GET /cars?carMake", "GET",
+             lambda rng, fleet: ("/cars", {"carMake": rng.choice(["toy", "golf", "bm"])},
+                                 None)),
+    Scenario("GET /cars?garageId", "GET",
+             lambda rng, fleet: ("/cars", {"garageId": rng.randint(1, fleet["garages"])},
+                                 None)),
+    Scenario("GET /cars/{car_id}", "GET",
+             lambda rng, fleet: (f"/cars/{rng.randint(1, fleet['cars'])}", {}, None)),
+    Scenario("GET /garages", "GET", lambda rng, fleet: ("/garages", {}, None)),
+    Scenario("GET /garages/{garage_id}", "GET",
+             lambda rng, fleet: (f"/garages/{rng.randint(1, fleet['garages'])}", {}, None)),
+    Scenario("GET /maintenance", "GET", lambda rng, fleet: ("/maintenance", {}, None)),
+    Scenario("GET /maintenance?garageId", "GET",
+             lambda rng, fleet: ("/maintenance",
+                                 {"garageId": rng.randint(1, fleet["garages"])}, None)),
+    Scenario("GET /maintenance/{maintenance_id}", "GET",
+             lambda rng, fleet: (f"/maintenance/{rng.randint(1, fleet['maintenances'])}",
+                                 {}, None)),
+    Scenario("GET /garages/dailyAvailabilityReport", "GET", _daily_report,
+             postgres_only=True),
+    Scenario("GET /garages/availabilityMatrix", "GET", _availability_matrix),
+    Scenario("GET /maintenance/monthlyRequestsReport", "GET", _monthly_report),
+    Scenario("GET /maintenance/nextAvailable", "GET", _next_available,
+             postgres_only=True),
+    Scenario("GET /maintenance/export", "GET", _export),
+    Scenario("GET /cars/search", "GET", _search_cars, postgres_only=True),
+    # Writes come last so the reads above see the seeded fleet unchanged.
+    Scenario("POST /garages", "POST",
+             lambda rng, fleet: ("/garages", {}, _garage_body(rng, fleet))),
+    Scenario("PUT /garages/{garage_id}", "PUT", _update_garage),
+    Scenario("DELETE /garages/{garage_id}", "DELETE",
+             setup=_deleting("/garages", _garage_body)),
+    Scenario("POST /cars", "POST", lambda rng, fleet: ("/cars", {}, _car_body(rng, fleet))),
+    Scenario("POST /cars/bulk", "POST", _create_cars_bulk),
+    Scenario("PUT /cars/{car_id}", "PUT", _update_car),
+    Scenario("DELETE /cars/{car_id}", "DELETE", setup=_deleting("/cars", _car_body)),
+    Scenario("POST /maintenance", "POST", _create_maintenance),
+    Scenario("POST /maintenance/bulk", "POST", _create_maintenances_bulk),
+    Scenario("PUT /maintenance/{maintenance_id}", "PUT", _update_maintenance),
+    Scenario("DELETE /maintenance/{maintenance_id}", "DELETE",
+             setup=_deleting("/maintenance", _maintenance_body)),
+]
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+async def run_scenario(client, scenario: Scenario, fleet: dict, requests: int,
+                       concurrency: int, random_seed: int) -> dict:
+    rng = random.Random(random_seed)
+    if scenario.setup:
+        plan = await scenario.setup(client, rng, fleet, requests)
+    else:
+        plan = [scenario.request(rng, fleet) for _ in range(requests)]
+    latencies = []
+    errors = 0
+    server_errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal errors, server_errors, next_index
+        while next_index < len(plan):
+            path, params, body = plan[next_index]
+            next_index += 1
+            start = time.perf_counter()
+            response = await client.request(scenario.method, path, params=params, json=body)
+            latency = time.perf_counter() - start
+            # A shed or failed request returns fast; timing it would flatter p50/p99.
+            if response.status_code >= 500:
+                server_errors += 1
+                continue
+            latencies.append(latency)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies) + server_errors,
+        "errors": errors,
+        "serverErrors": server_errors,
+        "throughputRps": len(latencies) / elapsed if elapsed else 0.0,
+        "meanMs": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+        "p50Ms": percentile(latencies, 0.50) * 1000,
+        "p95Ms": percentile(latencies, 0.95) * 1000,
+        "p99Ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+async def run_all(fleet: dict, dialect: str, requests: int, concurrency: int,
+                  warmup: int, random_seed: int, only: list[str] | None) -> dict:
+    import httpx
+    from main import create_app
+
+    app = create_app()
+    results = {}
+    # An unhandled error becomes a 500 counted in serverErrors, as it would be
+    # behind a real server, instead of aborting the run.
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    # ASGITransport doesn't send lifespan events, so the engine is set up here.
+    async with app.router.lifespan_context(app), \
+            httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for scenario in SCENARIOS:
+            if only and scenario.name not in only:
+                continue
+            if scenario.postgres_only and dialect != "postgresql":
+                results[scenario.name] = {"skipped": f"requires postgresql, not {dialect}"}
+                continue
+            if warmup:
+                await run_scenario(client, scenario, fleet, warmup, concurrency,
+                                   random_seed + 1)
+            results[scenario.name] = await run_scenario(
+                client, scenario, fleet, requests, concurrency, random_seed
+            )
+            print(f"{scenario.name}: {json.dumps(results[scenario.name])}",
+                  file=sys.stderr)
+    return results
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> list[str]:
+    """
+    Lists the scenarios whose p95 latency or throughput regressed beyond
+    max_regression (a fraction) relative to the baseline results.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous or "skipped" in current or "skipped" in previous:
+            continue
+        if current["p95Ms"] > previous["p95Ms"] * (1 + max_regression):
+            regressions.append(f"{name}: p95 {previous['p95Ms']:.2f} ms -> "
+                               f"{current['p95Ms']:.2f} ms")
+        if current["throughputRps"] < previous["throughputRps"] * (1 - max_regression):
+            regressions.append(f"{name}: throughput {previous['throughputRps']:.1f} -> "
+                               f"{current['throughputRps']:.1f} req/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True)
+    add_size_arguments(parser)
+    parser.add_argument("--skip-seed", action="store_true",
+                        help="reuse a database seeded earlier with the same sizes")
+    parser.add_argument("--requests", type=int, default=500,
+                        help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=20,
+                        help="unmeasured requests per scenario")
+    parser.add_argument("--scenario", action="append", dest="scenarios",
+                        help="run only this scenario, may be repeated")
+    parser.add_argument("--output", help="write results JSON to this file")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.10)
+    parser.add_argument("--admission", action="store_true",
+                        help="keep admission control on, with the ADMISSION_* "
+                             "limits from the environment")
+    args = parser.parse_args()
+
+    # create_app() and the ORM read their configuration from the environment.
+    os.environ["DATABASE_URL"] = args.database_url
+    if not args.admission:
+        os.environ["ADMISSION_ENABLED"] = "false"
+    engine = create_engine(args.database_url)
+    dialect = engine.dialect.name
+    sizes = sizes_from_arguments(args)
+    if args.skip_seed:
+        fleet = dict(sizes, firstDay=FIRST_DAY.isoformat(), days=DAYS)
+    else:
+        fleet = seed(engine, random_seed=args.random_seed, **sizes)
+    engine.dispose()
+
+    results = asyncio.run(run_all(fleet, dialect, args.requests, args.concurrency,
+                                  args.warmup, args.random_seed, args.scenarios))
+    report = {
+        "meta": {
+            "dialect": dialect,
+            "dbMode": os.getenv("DB_MODE", "sync"),
+            "fleet": fleet,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    else:
+        print(output)
+
+    failed = False
+    for name, result in results.items():
+        if result.get("serverErrors"):
+            print(f"SERVER ERRORS {name}: {result['serverErrors']} of "
+                  f"{result['requests']} requests", file=sys.stderr)
+            failed = True
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        failed = failed or bool(regressions)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Seeds a database with a synthetic fleet for the benchmarks.
+
+    python -m benchmarks.seed --database-url sqlite:///bench.db --profile 100k
+
+Profiles set the number of garages, cars and maintenances; any of them can be
+overridden individually. Existing rows in the target database are removed.
+"""
+import argparse
+import os
+import random
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, delete, insert, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+PROFILES = {
+    "1k": {"garages": 10, "cars": 200, "maintenances": 1_000},
+    "100k": {"garages": 100, "cars": 10_000, "maintenances": 100_000},
+    "1m": {"garages": 500, "cars": 100_000, "maintenances": 1_000_000},
+}
+MAKES = {
+    "Toyota": ["Corolla", "Yaris", "RAV4", "Camry"],
+    "Volkswagen": ["Golf", "Passat", "Polo", "Tiguan"],
+    "Ford": ["Focus", "Fiesta", "Mondeo", "Kuga"],
+    "BMW": ["320d", "X3", "X5", "118i"],
+    "Skoda": ["Octavia", "Fabia", "Superb", "Kodiaq"],
+}
+CITIES = ["Sofia", "Plovdiv", "Varna", "Burgas", "Ruse", "Stara Zagora"]
+SERVICE_TYPES = ["Oil change", "Tyre change", "Brake check", "Inspection", "Repair"]
+FIRST_DAY = date(2023, 1, 1)
+DAYS = 3 * 365
+BATCH_SIZE = 10_000
+
+
+def license_plate(car_id: int) -> str:
+    return f"CB{car_id:06d}XX"
+
+
+def _batches(rows, size=BATCH_SIZE):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def seed(engine: Engine, garages: int, cars: int, maintenances: int,
+         random_seed: int = 42) -> dict:
+    """
+    Recreates the schema contents with a deterministic synthetic fleet and
+    returns the sizes that were generated.
+    """
+    from orm.booking_rollup import rebuild
+    from orm.orm_bases import Base, CarGarageAssociations, Cars, GarageDailyBookings, \
+        Garages, Maintenances
+
+    rng = random.Random(random_seed)
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as connection:
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    Base.metadata.create_all(engine)
+
+    with Session(engine) as session, session.begin():
+        for table in (GarageDailyBookings, Maintenances, CarGarageAssociations,
+                      Cars, Garages):
+            session.execute(delete(table))
+
+        garage_rows = [{
+            "garage_id": garage_id,
+            "name": f"Garage {garage_id}",
+            "location": f"{rng.randint(1, 200)} Main Street",
+            "city": rng.choice(CITIES),
+            "capacity": rng.randint(5, 50),
+        } for garage_id in range(1, garages + 1)]
+        for batch in _batches(garage_rows):
+            session.execute(insert(Garages), batch)
+
+        car_rows = []
+        association_rows = []
+        for car_id in range(1, cars + 1):
+            make = rng.choice(list(MAKES))
+            car_rows.append({
+                "car_id": car_id,
+                "make": make,
+                "model": rng.choice(MAKES[make]),
+                "production_year": rng.randint(1995, 2025),
+                "license_plate": license_plate(car_id),
+            })
+            for garage_id in rng.sample(range(1, garages + 1), min(2, garages)):
+                association_rows.append({"car_id": car_id, "garage_id": garage_id})
+        for batch in _batches(car_rows):
+            session.execute(insert(Cars), batch)
+        for batch in _batches(association_rows):
+            session.execute(insert(CarGarageAssociations), batch)
+
+        # Generated batch by batch so the 1m profile stays within memory.
+        for start in range(1, maintenances + 1, BATCH_SIZE):
+            session.execute(insert(Maintenances), [{
+                "maintenance_id": maintenance_id,
+                "car_id": rng.randint(1, cars),
+                "garage_id": rng.randint(1, garages),
+                "service_type": rng.choice(SERVICE_TYPES),
+                "scheduled_date": FIRST_DAY + timedelta(days=rng.randrange(DAYS)),
+            } for maintenance_id in range(start, min(start + BATCH_SIZE,
+                                                     maintenances + 1))])
+
+        rebuild(session)
+
+    if engine.dialect.name == "postgresql":
+        # Explicit ids bypass the sequences, so move them past the seeded rows.
+        with engine.begin() as connection:
+            for table, column in (("garages", "garage_id"), ("cars", "car_id"),
+                                  ("maintenances", "maintenance_id")):
+                connection.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', '{column}'), "
+                    f"(SELECT max({column}) FROM {table}))"
+                ))
+            connection.execute(text("ANALYZE"))
+
+    return {"garages": garages, "cars": cars, "maintenances": maintenances,
+            "firstDay": FIRST_DAY.isoformat(), "days": DAYS}
+
+
+def add_size_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="1k")
+    parser.add_argument("--garages", type=int)
+    parser.add_argument("--cars", type=int)
+    parser.add_argument("--maintenances", type=int)
+    parser.add_argument("--random-seed", type=int, default=42)
+
+
+def sizes_from_arguments(args: argparse.Namespace) -> dict:
+    sizes = dict(PROFILES[args.profile])
+    for name in sizes:
+        if getattr(args, name) is not None:
+            sizes[name] = getattr(args, name)
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True)
+    add_size_arguments(parser)
+    args = parser.parse_args()
+
+    # The ORM package builds its engine from DATABASE_URL on import.
+    os.environ["DATABASE_URL"] = args.database_url
+    sizes = sizes_from_arguments(args)
+    print(seed(create_engine(args.database_url), random_seed=args.random_seed, **sizes))
+
+
+if __name__ == "__main__":
+    main()
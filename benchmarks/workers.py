@@ -0,0 +1,159 @@
+"""
+Worker scaling benchmark for the multi-worker server.
+
+Seeds a fleet once, then for every worker count starts `python -m server`
+on a local port, drives the chosen scenarios over real HTTP with a fixed
+number of concurrent clients, and stops the server again:
+
+    python -m benchmarks.workers --database-url postgresql://... --profile 100k \\
+        --workers 1 2 4 8 --db-connection-budget 32 --output workers.json
+
+The report lists throughput and latency per worker count, and the speed-up
+relative to the first worker count.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import signal
+import subprocess
+import sys
+import time
+
+from sqlalchemy import create_engine
+
+from benchmarks.run import SCENARIOS, run_scenario
+from benchmarks.seed import DAYS, FIRST_DAY, add_size_arguments, seed, \
+    sizes_from_arguments
+
+DEFAULT_SCENARIOS = ["GET /cars/{car_id}", "GET /maintenance?garageId",
+                     "POST /maintenance"]
+
+
+def start_server(workers: int, port: int, database_url: str,
+                 connection_budget: int) -> subprocess.Popen:
+    environment = dict(os.environ, DATABASE_URL=database_url)
+    command = [sys.executable, "-m", "server", "--host", "127.0.0.1",
+               "--port", str(port), "--workers", str(workers)]
+    if connection_budget:
+        command += ["--db-connection-budget", str(connection_budget)]
+    return subprocess.Popen(command, env=environment)
+
+
+async def wait_until_ready(client, process: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            if (await client.get("/")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise TimeoutError("Server did not become ready in time")
+
+
+async def run_workers(workers: int, fleet: dict, args: argparse.Namespace) -> dict:
+    import httpx
+
+    process = start_server(workers, args.port, args.database_url,
+                           args.db_connection_budget)
+    limits = httpx.Limits(max_connections=args.concurrency,
+                          max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}",
+                                     limits=limits, timeout=60) as client:
+            await wait_until_ready(client, process)
+            results = {}
+            for scenario in SCENARIOS:
+                if scenario.name not in args.scenarios:
+                    continue
+                if args.warmup:
+                    await run_scenario(client, scenario, fleet, args.warmup,
+                                       args.concurrency, args.random_seed + 1)
+                results[scenario.name] = await run_scenario(
+                    client, scenario, fleet, args.requests, args.concurrency,
+                    args.random_seed
+                )
+                print(f"{workers} workers, {scenario.name}: "
+                      f"{json.dumps(results[scenario.name])}", file=sys.stderr)
+            return results
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=60)
+
+
+def speedups(results: dict[int, dict]) -> dict:
+    """
+    Throughput of every worker count relative to the smallest one, per scenario.
+    """
+    baseline_workers = min(results)
+    return {
+        workers: {
+            name: (result["throughputRps"] /
+                   results[baseline_workers][name]["throughputRps"]
+                   if results[baseline_workers][name]["throughputRps"] else 0.0)
+            for name, result in scenarios.items()
+        }
+        for workers, scenarios in results.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True)
+    add_size_arguments(parser)
+    parser.add_argument("--skip-seed", action="store_true",
+                        help="reuse a database seeded earlier with the same sizes")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--db-connection-budget", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--requests", type=int, default=2000,
+                        help="requests per scenario and worker count")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--warmup", type=int, default=100,
+                        help="unmeasured requests per scenario")
+    parser.add_argument("--scenario", action="append", dest="scenarios",
+                        help="run only this scenario, may be repeated")
+    parser.add_argument("--output", help="write results JSON to this file")
+    args = parser.parse_args()
+    args.scenarios = args.scenarios or DEFAULT_SCENARIOS
+
+    engine = create_engine(args.database_url)
+    sizes = sizes_from_arguments(args)
+    if args.skip_seed:
+        fleet = dict(sizes, firstDay=FIRST_DAY.isoformat(), days=DAYS)
+    else:
+        fleet = seed(engine, random_seed=args.random_seed, **sizes)
+    engine.dispose()
+
+    results = {workers: asyncio.run(run_workers(workers, fleet, args))
+               for workers in sorted(set(args.workers))}
+    report = {
+        "meta": {
+            "dialect": engine.dialect.name,
+            "fleet": fleet,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "dbConnectionBudget": args.db_connection_budget,
+            "cpus": os.cpu_count(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+        "speedup": speedups(results),
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
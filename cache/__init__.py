@@ -0,0 +1,13 @@
+import os
+
+from cache.backends import CacheBackend, InMemoryLRUBackend, RedisBackend
+
+
+def build_backend(name: str, max_entries: int, ttl_seconds: float) -> CacheBackend:
+    """
+    Builds the cache backend selected by name ("memory" or "redis").
+    """
+    if name == "redis":
+        return RedisBackend(os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+                            ttl_seconds)
+    return InMemoryLRUBackend(max_entries, ttl_seconds)
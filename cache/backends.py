@@ -0,0 +1,112 @@
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:  # redis is only needed for the shared backend
+    redis = None
+
+
+class CacheBackend(ABC):
+    """
+    Minimal key/value interface the caches are written against.
+    Values are JSON-compatible so that any backend can store them.
+
+    Backends that wait on the network set blocking, so that callers on the
+    event loop run their methods in the threadpool.
+    """
+
+    blocking = False
+
+    @abstractmethod
+    def get(self, key: str):
+        ...
+
+    def get_many(self, keys: list[str]) -> list:
+        return [self.get(key) for key in keys]
+
+    @abstractmethod
+    def set(self, key: str, value):
+        ...
+
+    @abstractmethod
+    def delete(self, *keys: str):
+        ...
+
+
+class InMemoryLRUBackend(CacheBackend):
+    """
+    Process-local cache bounded by entry count, with a TTL per entry.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisBackend(CacheBackend):
+    """
+    Cache shared by every worker through Redis; eviction is left to Redis'
+    maxmemory policy and entries expire after the TTL.
+    """
+
+    blocking = True
+
+    def __init__(self, url: str, ttl_seconds: float, prefix: str = "car-management:"):
+        if redis is None:
+            raise RuntimeError("The redis package is required for the redis cache backend.")
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def get(self, key: str):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def get_many(self, keys: list[str]) -> list:
+        if not keys:
+            return []
+        raws = self.client.mget([self.prefix + key for key in keys])
+        return [json.loads(raw) if raw is not None else None for raw in raws]
+
+    def set(self, key: str, value):
+        self.client.set(self.prefix + key, json.dumps(value, default=str),
+                        px=int(self.ttl_seconds * 1000))
+
+    def delete(self, *keys: str):
+        if keys:
+            self.client.delete(*(self.prefix + key for key in keys))
@@ -1,27 +1,237 @@
+import json
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routes import car_router, garage_router, maintenances_router
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.datastructures import MutableHeaders
+
+from settings import Settings
+
+
+def _process_started() -> float:
+    """
+    perf_counter() reading at process start, from /proc where available so
+    interpreter start-up is included; otherwise the time main was imported.
+    """
+    try:
+        with open("/proc/self/stat") as stat, open("/proc/uptime") as uptime:
+            start_ticks = int(stat.read().rsplit(")", 1)[1].split()[19])
+            age = float(uptime.read().split()[0]) - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        age = 0.0
+    return time.perf_counter() - max(age, 0.0)
+
 
-app = FastAPI()
+PROCESS_STARTED = _process_started()
+request_logger = logging.getLogger("car_management.requests")
+startup_logger = logging.getLogger("car_management.startup")
 origins = [
     "http://localhost:3000",
 ]
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-app.include_router(car_router, tags=["Cars"])
-app.include_router(garage_router, tags=["Garages"])
-app.include_router(maintenances_router, tags=["Maintenances"])
-
-
-@app.get("/")
-def root():
-    return {
-        "message": "Welcome to car-management-backend api, "
-                   "Go to /docs to see the swagger documentation :)"
-    }
+
+class QueryStatsMiddleware:
+    """
+    Reports handler time, statement count, DB time and the slowest statement of
+    every request as a Server-Timing header and a structured log line.
+    """
+
+    def __init__(self, app, repeat_threshold: int):
+        from orm import query_stats
+
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+        self.query_stats = query_stats
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = self.query_stats.begin_request()
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                handler_ms = (time.perf_counter() - start) * 1000
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", (
+                    f"app;dur={handler_ms:.1f}, "
+                    f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.count} queries", '
+                    f"db-slowest;dur={stats.slowest_seconds * 1000:.1f}"
+                ))
+                self.log(scope, message["status"], handler_ms, stats)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            self.query_stats.end_request(token)
+
+    def log(self, scope, status: int, handler_ms: float, stats):
+        record = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status,
+            "durationMs": round(handler_ms, 2),
+            "sqlCount": stats.count,
+            "sqlMs": round(stats.db_seconds * 1000, 2),
+            "slowestSqlMs": round(stats.slowest_seconds * 1000, 2),
+            "slowestSql": (stats.slowest_statement or "")[:200],
+        }
+        if repeated := stats.repeated(self.repeat_threshold):
+            record["repeatedSql"] = [
+                {"count": count, "sql": statement[:200]}
+                for statement, count in repeated.items()
+            ]
+            request_logger.warning(json.dumps(record))
+        elif request_logger.isEnabledFor(logging.INFO):
+            request_logger.info(json.dumps(record))
+
+
+class StartupTimings:
+    """
+    Seconds from process start to each start-up milestone: app created,
+    lifespan ready (engine built, pool warmed, statements compiled) and the
+    first response sent.
+    """
+
+    def __init__(self, started: float):
+        self.started = started
+        self.marks: dict[str, float] = {}
+
+    def mark(self, name: str):
+        if name not in self.marks:
+            self.marks[name] = round(time.perf_counter() - self.started, 4)
+            startup_logger.info(json.dumps({"event": name, "seconds": self.marks[name]}))
+
+
+class FirstRequestMiddleware:
+    """
+    Marks the first response sent by the process in its StartupTimings.
+    """
+
+    def __init__(self, app, timings: StartupTimings):
+        self.app = app
+        self.timings = timings
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or "firstRequest" in self.timings.marks:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_and_mark(message):
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body"):
+                self.timings.mark("firstRequest")
+
+        await self.app(scope, receive, send_and_mark)
+
+
+def create_app(settings: Settings | None = None) -> FastAPI:
+    """
+    Builds the API for settings, read from the environment by default.
+
+    Routers, metrics and the ORM are imported here rather than when main is
+    imported, and the database engine is created, warmed and disposed by the
+    app's lifespan. Servers call it once per process: python -m server, or
+    uvicorn main:create_app --factory. uvicorn main:app still works through
+    the module __getattr__ below.
+    """
+    settings = settings or Settings.from_env()
+    timings = StartupTimings(PROCESS_STARTED)
+
+    from metrics import MetricsMiddleware, install_admission_metrics, \
+        install_db_metrics, metrics_router
+    from orm import db_session
+    from routes import car_router, garage_router, maintenances_router, admin_router
+    from routes.admission import configure_reads
+    from orm.partitions import create_future_partitions
+    from routes.warmup import precompile_statements
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        db_session.configure(settings)
+        configure_reads(settings.pool_size + settings.max_overflow)
+        install_db_metrics()
+        if settings.db_mode == "async":
+            await db_session.warm_up_async(settings.warm_connections)
+            if settings.create_partitions_on_startup:
+                async with db_session.AsyncSessionLocal() as session:
+                    await session.run_sync(create_future_partitions)
+                    await session.commit()
+            if settings.precompile_statements:
+                async with db_session.AsyncSessionLocal() as session:
+                    await session.run_sync(precompile_statements)
+        else:
+            db_session.warm_up(settings.warm_connections)
+            if settings.create_partitions_on_startup:
+                with db_session.get_db_session() as session:
+                    create_future_partitions(session)
+            if settings.precompile_statements:
+                with db_session.get_db_session() as session:
+                    precompile_statements(session)
+        timings.mark("ready")
+        yield
+        await db_session.dispose()
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.settings = settings
+    app.state.startup = timings
+
+    # "gzip", "br" (brotli, needs brotli-asgi; falls back to gzip for clients
+    # without brotli support) or "off"; bodies under the minimum stay uncompressed.
+    if settings.response_compression == "br":
+        from brotli_asgi import BrotliMiddleware
+        app.add_middleware(BrotliMiddleware,
+                           minimum_size=settings.response_compression_min_bytes,
+                           gzip_fallback=True)
+    elif settings.response_compression == "gzip":
+        app.add_middleware(GZipMiddleware,
+                           minimum_size=settings.response_compression_min_bytes)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    # Requests repeating one statement shape more often than the threshold
+    # are flagged as N+1.
+    app.add_middleware(QueryStatsMiddleware, repeat_threshold=settings.sql_repeat_threshold)
+    app.add_middleware(MetricsMiddleware)
+    app.add_middleware(FirstRequestMiddleware, timings=timings)
+    install_admission_metrics()
+    app.include_router(car_router, tags=["Cars"])
+    app.include_router(garage_router, tags=["Garages"])
+    app.include_router(maintenances_router, tags=["Maintenances"])
+    app.include_router(admin_router, tags=["Admin"])
+    app.include_router(metrics_router)
+
+    @app.get("/")
+    def root():
+        return {
+            "message": "Welcome to car-management-backend api, "
+                       "Go to /docs to see the swagger documentation :)"
+        }
+
+    timings.mark("appCreated")
+    return app
+
+
+_app: FastAPI | None = None
+
+
+def __getattr__(name: str):
+    # main.app, as loaded by uvicorn main:app, is built from the environment on
+    # first access, so a plain import of main stays cheap.
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,160 @@
+"""
+Prometheus metrics for the API.
+
+Set PROMETHEUS_MULTIPROC_DIR to a shared, emptied directory before starting
+the workers to aggregate samples across processes; /metrics then merges the
+files written by every worker. In that mode prometheus_client updates every
+value of a process under one lock, so server.py only uses it with more than
+one worker.
+"""
+import os
+import time
+
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, \
+    Counter, Gauge, Histogram, generate_latest, multiprocess
+
+from orm import query_stats
+from orm.db_session import active_pool, pool_stats
+from routes import admission
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 5)
+
+http_requests = Counter(
+    "http_requests_total", "HTTP requests served.",
+    ["method", "route", "status"],
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Time to produce the response headers.",
+    ["method", "route", "status"], buckets=REQUEST_BUCKETS,
+)
+db_query_duration = Histogram(
+    "db_query_duration_seconds", "SQL statement execution time.",
+    ["operation"], buckets=QUERY_BUCKETS,
+)
+http_requests_shed = Counter(
+    "http_requests_shed_total", "Requests rejected with 503 by admission control.",
+    ["route", "reason"],
+)
+db_pool_checked_out = Gauge(
+    "db_pool_checked_out", "Connections currently checked out of the pool.",
+    multiprocess_mode="livesum",
+)
+db_pool_overflow = Gauge(
+    "db_pool_overflow", "Overflow connections currently open beyond pool_size.",
+    multiprocess_mode="livesum",
+)
+db_pool_waiters = Gauge(
+    "db_pool_waiters", "Requests waiting for a pooled connection.",
+    multiprocess_mode="livesum",
+)
+
+# Labelled children are cached so that the hot path is a dict lookup plus the
+# child's own value update, instead of going through the metric-wide labels() lock.
+# Outside multiprocess mode each value update only takes that value's lock.
+_request_children: dict[tuple[str, str, str], tuple] = {}
+_query_children: dict[str, Histogram] = {}
+
+
+def _request_metrics(method: str, route: str, status: str) -> tuple:
+    key = (method, route, status)
+    children = _request_children.get(key)
+    if children is None:
+        children = (http_requests.labels(*key), http_request_duration.labels(*key))
+        _request_children[key] = children
+    return children
+
+
+def _observe_statement(statement: str, seconds: float):
+    operation = statement.lstrip()[:6].upper()
+    child = _query_children.get(operation)
+    if child is None:
+        child = _query_children[operation] = db_query_duration.labels(operation)
+    child.observe(seconds)
+
+
+POOL_GAUGES = {
+    db_pool_checked_out: lambda: active_pool().checkedout(),
+    db_pool_overflow: lambda: max(active_pool().overflow(), 0),
+    db_pool_waiters: lambda: pool_stats.waiting,
+}
+
+
+def _update_pool_gauges():
+    for gauge, read in POOL_GAUGES.items():
+        gauge.set(read())
+
+
+def install_db_metrics():
+    """
+    Hooks statement timing and pool gauges onto the engine in use.
+
+    The pool gauges are read from the pool when /metrics is scraped. Samples
+    merged across workers come from files the scraping worker can't refresh
+    for the others, so in that mode every worker writes its gauges whenever
+    its pool changes instead.
+    """
+    if _observe_statement not in query_stats.statement_observers:
+        query_stats.statement_observers.append(_observe_statement)
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        if _update_pool_gauges not in pool_stats.observers:
+            pool_stats.observers.append(_update_pool_gauges)
+        _update_pool_gauges()
+    else:
+        for gauge, read in POOL_GAUGES.items():
+            gauge.set_function(read)
+
+
+def _observe_shed(route: str, reason: str):
+    http_requests_shed.labels(route, reason).inc()
+
+
+def install_admission_metrics():
+    """
+    Counts the requests shed by the routes' admission limiters.
+    """
+    if _observe_shed not in admission.shed_observers:
+        admission.shed_observers.append(_observe_shed)
+
+
+class MetricsMiddleware:
+    """
+    Counts requests and records their latency labelled by route template.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.start":
+                # The router stores the matched APIRoute in the scope.
+                route = scope.get("route")
+                route_path = route.path if route is not None else "unmatched"
+                count, duration = _request_metrics(scope["method"], route_path,
+                                                   str(message["status"]))
+                count.inc()
+                duration.observe(time.perf_counter() - start)
+            await send(message)
+
+        await self.app(scope, receive, send_with_metrics)
+
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+def get_metrics():
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
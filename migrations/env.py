@@ -6,11 +6,10 @@ from sqlalchemy import pool
 from alembic import context
 from orm import Base
 
-from dotenv import load_dotenv
-from orm.db_session import DATABASE_URL
+from settings import Settings
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
-load_dotenv()
+DATABASE_URL = Settings.from_env().database_url
 config = context.config
 
 # Interpret the config file for Python logging.
@@ -0,0 +1,66 @@
+"""baseline schema
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001_baseline'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'garages',
+        sa.Column('garage_id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('location', sa.String(), nullable=False),
+        sa.Column('city', sa.String(), nullable=False),
+        sa.Column('capacity', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('garage_id'),
+    )
+    op.create_table(
+        'cars',
+        sa.Column('car_id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('make', sa.String(), nullable=False),
+        sa.Column('model', sa.String(), nullable=False),
+        sa.Column('production_year', sa.Integer(), nullable=False),
+        sa.Column('license_plate', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('car_id'),
+        sa.UniqueConstraint('license_plate'),
+    )
+    op.create_table(
+        'car_garage',
+        sa.Column('car_id', sa.Integer(), nullable=False),
+        sa.Column('garage_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['car_id'], ['cars.car_id']),
+        sa.ForeignKeyConstraint(['garage_id'], ['garages.garage_id']),
+        sa.PrimaryKeyConstraint('car_id', 'garage_id'),
+    )
+    op.create_table(
+        'maintenances',
+        sa.Column('maintenance_id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('car_id', sa.Integer(), nullable=False),
+        sa.Column('garage_id', sa.Integer(), nullable=False),
+        sa.Column('service_type', sa.String(), nullable=False),
+        sa.Column('scheduled_date', sa.Date(), nullable=False),
+        sa.ForeignKeyConstraint(['car_id'], ['cars.car_id']),
+        sa.ForeignKeyConstraint(['garage_id'], ['garages.garage_id']),
+        sa.PrimaryKeyConstraint('maintenance_id'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('maintenances')
+    op.drop_table('car_garage')
+    op.drop_table('cars')
+    op.drop_table('garages')
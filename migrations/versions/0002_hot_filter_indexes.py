@@ -0,0 +1,47 @@
+"""indexes for hot filters
+
+Revision ID: 0002_hot_filter_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-18 12:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002_hot_filter_indexes'
+down_revision: Union[str, None] = '0001_baseline'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Both reports filter on garage_id and a scheduled_date range.
+    op.create_index('ix_maintenances_garage_id_scheduled_date', 'maintenances',
+                    ['garage_id', 'scheduled_date'])
+    op.create_index('ix_maintenances_car_id', 'maintenances', ['car_id'])
+    # Pages and exports are sorted and seeked on (scheduled_date, maintenance_id).
+    op.create_index('ix_maintenances_scheduled_date_maintenance_id', 'maintenances',
+                    ['scheduled_date', 'maintenance_id'])
+    # The primary key (car_id, garage_id) cannot serve lookups by garage.
+    op.create_index('ix_car_garage_garage_id_car_id', 'car_garage',
+                    ['garage_id', 'car_id'])
+
+    # Trigram indexes let the ilike '%x%' filters avoid sequential scans.
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_cars_make_trgm', 'cars', ['make'],
+                    postgresql_using='gin', postgresql_ops={'make': 'gin_trgm_ops'})
+    op.create_index('ix_garages_city_trgm', 'garages', ['city'],
+                    postgresql_using='gin', postgresql_ops={'city': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_garages_city_trgm', table_name='garages')
+    op.drop_index('ix_cars_make_trgm', table_name='cars')
+    op.drop_index('ix_car_garage_garage_id_car_id', table_name='car_garage')
+    op.drop_index('ix_maintenances_scheduled_date_maintenance_id',
+                  table_name='maintenances')
+    op.drop_index('ix_maintenances_car_id', table_name='maintenances')
+    op.drop_index('ix_maintenances_garage_id_scheduled_date', table_name='maintenances')
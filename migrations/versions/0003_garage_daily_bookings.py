@@ -0,0 +1,39 @@
+"""garage daily bookings rollup
+
+Revision ID: 0003_garage_daily_bookings
+Revises: 0002_hot_filter_indexes
+Create Date: 2026-10-18 12:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003_garage_daily_bookings'
+down_revision: Union[str, None] = '0002_hot_filter_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'garage_daily_bookings',
+        sa.Column('garage_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('requests', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['garage_id'], ['garages.garage_id'],
+                                ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('garage_id', 'day'),
+    )
+    op.execute(
+        'INSERT INTO garage_daily_bookings (garage_id, day, requests) '
+        'SELECT garage_id, scheduled_date, count(*) FROM maintenances '
+        'GROUP BY garage_id, scheduled_date'
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('garage_daily_bookings')
@@ -0,0 +1,32 @@
+"""trigram index for car search
+
+Revision ID: 0004_car_search_index
+Revises: 0003_garage_daily_bookings
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004_car_search_index'
+down_revision: Union[str, None] = '0003_garage_daily_bookings'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # GiST rather than GIN so that ORDER BY q <<-> document LIMIT n is answered
+    # by a nearest-neighbour index scan.
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.execute(
+        "CREATE INDEX ix_cars_search_trgm ON cars USING gist "
+        "((lower(make || ' ' || model || ' ' || coalesce(license_plate, ''))) "
+        "gist_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_cars_search_trgm', table_name='cars')
@@ -0,0 +1,154 @@
+"""monthly range partitions for maintenances
+
+Revision ID: 0005_partition_maintenances
+Revises: 0004_car_search_index
+Create Date: 2026-10-18 12:40:00.000000
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005_partition_maintenances'
+down_revision: Union[str, None] = '0004_car_search_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+# Creates the monthly partitions maintenances_YYYY_MM for `months` months from
+# first_month on, skipping existing ones. Rows already sitting in the default
+# partition for a new month are moved into it before it is attached.
+CREATE_PARTITIONS_FUNCTION = """
+CREATE OR REPLACE FUNCTION create_maintenance_partitions(first_month date, months integer)
+RETURNS integer LANGUAGE plpgsql AS $$
+DECLARE
+    month_start date := date_trunc('month', first_month)::date;
+    month_end date;
+    partition_name text;
+    created integer := 0;
+BEGIN
+    FOR i IN 1 .. months LOOP
+        month_end := (month_start + interval '1 month')::date;
+        partition_name := format('maintenances_%s', to_char(month_start, 'YYYY_MM'));
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format('CREATE TABLE %I (LIKE maintenances INCLUDING DEFAULTS)',
+                           partition_name);
+            EXECUTE format('WITH moved AS (DELETE FROM maintenances_default '
+                           'WHERE scheduled_date >= %L AND scheduled_date < %L '
+                           'RETURNING *) INSERT INTO %I SELECT * FROM moved',
+                           month_start, month_end, partition_name);
+            EXECUTE format('ALTER TABLE maintenances ATTACH PARTITION %I '
+                           'FOR VALUES FROM (%L) TO (%L)',
+                           partition_name, month_start, month_end);
+            created := created + 1;
+        END IF;
+        month_start := month_end;
+    END LOOP;
+    RETURN created;
+END $$
+"""
+
+
+def _months_between(first: date, last: date) -> int:
+    return (last.year - first.year) * 12 + last.month - first.month + 1
+
+
+def upgrade() -> None:
+    # The partition key must be part of the primary key, so it becomes
+    # (maintenance_id, scheduled_date); ids still come from the same sequence.
+    op.execute('ALTER TABLE maintenances RENAME TO maintenances_unpartitioned')
+    op.execute('ALTER INDEX maintenances_pkey RENAME TO maintenances_unpartitioned_pkey')
+    op.execute('ALTER INDEX ix_maintenances_garage_id_scheduled_date '
+               'RENAME TO ix_maintenances_unpartitioned_garage_id_scheduled_date')
+    op.execute('ALTER INDEX ix_maintenances_car_id '
+               'RENAME TO ix_maintenances_unpartitioned_car_id')
+    op.execute('ALTER INDEX ix_maintenances_scheduled_date_maintenance_id '
+               'RENAME TO ix_maintenances_unpartitioned_scheduled_date_maintenance_id')
+    op.execute('ALTER SEQUENCE maintenances_maintenance_id_seq OWNED BY NONE')
+
+    op.execute("""
+        CREATE TABLE maintenances (
+            maintenance_id integer NOT NULL
+                DEFAULT nextval('maintenances_maintenance_id_seq'),
+            car_id integer NOT NULL REFERENCES cars (car_id),
+            garage_id integer NOT NULL REFERENCES garages (garage_id),
+            service_type varchar NOT NULL,
+            scheduled_date date NOT NULL,
+            PRIMARY KEY (maintenance_id, scheduled_date)
+        ) PARTITION BY RANGE (scheduled_date)
+    """)
+    op.execute('ALTER SEQUENCE maintenances_maintenance_id_seq '
+               'OWNED BY maintenances.maintenance_id')
+    op.execute('CREATE TABLE maintenances_default PARTITION OF maintenances DEFAULT')
+    op.create_index('ix_maintenances_garage_id_scheduled_date', 'maintenances',
+                    ['garage_id', 'scheduled_date'])
+    op.create_index('ix_maintenances_car_id', 'maintenances', ['car_id'])
+    op.create_index('ix_maintenances_scheduled_date_maintenance_id', 'maintenances',
+                    ['scheduled_date', 'maintenance_id'])
+    op.execute(CREATE_PARTITIONS_FUNCTION)
+
+    # Partitions cover every month with data up to MONTHS_AHEAD months from
+    # now, so the copy below lands in monthly partitions rather than the default.
+    bind = op.get_bind()
+    first, last = bind.execute(sa.text(
+        'SELECT min(scheduled_date), max(scheduled_date) FROM maintenances_unpartitioned'
+    )).one()
+    today = date.today()
+    ahead = date(today.year + (today.month + MONTHS_AHEAD - 1) // 12,
+                 (today.month + MONTHS_AHEAD - 1) % 12 + 1, 1)
+    first = min(first or today, today)
+    last = max(last or ahead, ahead)
+    bind.execute(sa.text('SELECT create_maintenance_partitions(:first, :months)'),
+                 {"first": first, "months": _months_between(first, last)})
+
+    op.execute(
+        'INSERT INTO maintenances (maintenance_id, car_id, garage_id, service_type, '
+        'scheduled_date) SELECT maintenance_id, car_id, garage_id, service_type, '
+        'scheduled_date FROM maintenances_unpartitioned'
+    )
+    op.execute('DROP TABLE maintenances_unpartitioned')
+    op.execute('ANALYZE maintenances')
+
+
+def downgrade() -> None:
+    # Partitions detached by the archive command are not brought back.
+    op.execute('ALTER TABLE maintenances RENAME TO maintenances_partitioned')
+    op.execute('ALTER INDEX maintenances_pkey RENAME TO maintenances_partitioned_pkey')
+    op.execute('ALTER INDEX ix_maintenances_garage_id_scheduled_date '
+               'RENAME TO ix_maintenances_partitioned_garage_id_scheduled_date')
+    op.execute('ALTER INDEX ix_maintenances_car_id '
+               'RENAME TO ix_maintenances_partitioned_car_id')
+    op.execute('ALTER INDEX ix_maintenances_scheduled_date_maintenance_id '
+               'RENAME TO ix_maintenances_partitioned_scheduled_date_maintenance_id')
+    op.execute('ALTER SEQUENCE maintenances_maintenance_id_seq OWNED BY NONE')
+    op.create_table(
+        'maintenances',
+        sa.Column('maintenance_id', sa.Integer(), nullable=False,
+                  server_default=sa.text("nextval('maintenances_maintenance_id_seq')")),
+        sa.Column('car_id', sa.Integer(), nullable=False),
+        sa.Column('garage_id', sa.Integer(), nullable=False),
+        sa.Column('service_type', sa.String(), nullable=False),
+        sa.Column('scheduled_date', sa.Date(), nullable=False),
+        sa.ForeignKeyConstraint(['car_id'], ['cars.car_id']),
+        sa.ForeignKeyConstraint(['garage_id'], ['garages.garage_id']),
+        sa.PrimaryKeyConstraint('maintenance_id'),
+    )
+    op.execute('ALTER SEQUENCE maintenances_maintenance_id_seq '
+               'OWNED BY maintenances.maintenance_id')
+    op.execute(
+        'INSERT INTO maintenances (maintenance_id, car_id, garage_id, service_type, '
+        'scheduled_date) SELECT maintenance_id, car_id, garage_id, service_type, '
+        'scheduled_date FROM maintenances_partitioned'
+    )
+    op.execute('DROP TABLE maintenances_partitioned')
+    op.execute('DROP FUNCTION create_maintenance_partitions(date, integer)')
+    op.create_index('ix_maintenances_garage_id_scheduled_date', 'maintenances',
+                    ['garage_id', 'scheduled_date'])
+    op.create_index('ix_maintenances_car_id', 'maintenances', ['car_id'])
+    op.create_index('ix_maintenances_scheduled_date_maintenance_id', 'maintenances',
+                    ['scheduled_date', 'maintenance_id'])
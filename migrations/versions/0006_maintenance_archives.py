@@ -0,0 +1,35 @@
+"""record of archived maintenances partitions
+
+Revision ID: 0006_maintenance_archives
+Revises: 0005_partition_maintenances
+Create Date: 2026-10-18 13:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006_maintenance_archives'
+down_revision: Union[str, None] = '0005_partition_maintenances'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # One row per partition written out and dropped by python -m orm.partitions
+    # archive; the rollup keeps counting those days, so it must not be rebuilt.
+    op.create_table(
+        'maintenance_archives',
+        sa.Column('partition', sa.Text(), primary_key=True),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('path', sa.Text(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(timezone=True), nullable=False,
+                  server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('maintenance_archives')
@@ -1,6 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from typing import Type
+from typing import Type, Optional
 
 from pydantic import BaseModel, Field
 
@@ -23,6 +23,24 @@ class GaragesOut(BaseModel):
         populate_by_name = True
 
 
+class GaragesPage(BaseModel):
+    items: list[GaragesOut]
+    nextCursor: Optional[str] = None
+
+
+class GarageAvailabilityRow(BaseModel):
+    id: int
+    name: str
+    capacity: int
+    requests: list[int]
+    availableCapacity: list[int]
+
+
+class AvailabilityMatrix(BaseModel):
+    dates: list[str]
+    garages: list[GarageAvailabilityRow]
+
+
 class CarsIn(BaseModel):
     make: str
     model: str
@@ -43,6 +61,21 @@ class CarsOut(BaseModel):
         populate_by_name = True
 
 
+class CarsPage(BaseModel):
+    items: list[CarsOut]
+    nextCursor: Optional[str] = None
+
+
+class BulkItemError(BaseModel):
+    index: int
+    detail: str
+
+
+class CarsBulkOut(BaseModel):
+    created: list[CarsOut]
+    errors: list[BulkItemError]
+
+
 class MaintenancesIn(BaseModel):
     garageId: int
     carId: int
@@ -63,6 +96,23 @@ class MaintenancesOut(BaseModel):
         populate_by_name = True
 
 
+class MaintenancesPage(BaseModel):
+    items: list[MaintenancesOut]
+    nextCursor: Optional[str] = None
+
+
+class MaintenancesBulkOut(BaseModel):
+    created: list[MaintenancesOut]
+    errors: list[BulkItemError]
+
+
+class AvailableSlot(BaseModel):
+    date: str
+    garageId: int
+    garageName: str
+    availableCapacity: int
+
+
 class MonthsEnum(Enum):
     JANUARY = "01"
     FEBRUARY = "02"
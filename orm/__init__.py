@@ -1,2 +1,3 @@
-from orm.orm_bases import Base, Garages, Cars, Maintenances, CarGarageAssociations
+from orm.orm_bases import Base, Garages, Cars, Maintenances, CarGarageAssociations, \
+    GarageDailyBookings
 from orm.db_session import get_db_session
\ No newline at end of file
@@ -0,0 +1,227 @@
+"""
+Maintenance of the garage_daily_bookings rollup.
+
+The maintenance routes call reserve_booking(s)/move_booking/record_booking inside
+the request transaction, so the rollup always matches the maintenances table.
+It doubles as the capacity counter: a reservation only succeeds while the
+(garage, day) row is below the garage's capacity. Rebuild it from scratch with:
+
+    python -m orm.booking_rollup rebuild [--garage-id ID]
+"""
+import argparse
+from datetime import date
+
+from sqlalchemy import Date, Integer, and_, delete, literal, literal_column, select, \
+    union_all, update, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func, tuple_
+
+from orm.orm_bases import GarageDailyBookings, Garages, Maintenances
+from orm.partitions import archived_partitions
+
+
+def _upsert(db: Session):
+    """
+    Dialect-specific INSERT supporting ON CONFLICT; SQLite is accepted so the
+    benchmarks can run against a local file.
+    """
+    dialect = db.get_bind().dialect.name
+    return (sqlite if dialect == "sqlite" else postgresql).insert(GarageDailyBookings)
+
+
+def record_booking(db: Session, garage_id: int, day: date, delta: int = 1):
+    """
+    Adds delta requests to the (garage, day) counter without a capacity check.
+    """
+    if delta > 0:
+        statement = _upsert(db).values(garage_id=garage_id, day=day, requests=delta)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[GarageDailyBookings.garage_id, GarageDailyBookings.day],
+            set_={"requests": GarageDailyBookings.requests + delta},
+        ))
+    elif delta < 0:
+        db.execute(update(GarageDailyBookings).where(
+            GarageDailyBookings.garage_id == garage_id,
+            GarageDailyBookings.day == day,
+        ).values(requests=GarageDailyBookings.requests + delta))
+
+
+def reserve_booking(db: Session, garage_id: int, day: date, count: int = 1) -> bool:
+    """
+    Atomically adds count requests to the (garage, day) counter if the garage
+    still has room for all of them; returns whether the reservation was made.
+
+    The check and the increment are one upsert, and concurrent bookings of the
+    same garage and day queue on that row's lock, so capacity can't be exceeded.
+    Bookings for other garages or days touch other rows and are not blocked.
+    """
+    capacity = select(Garages.capacity).where(
+        Garages.garage_id == garage_id
+    ).scalar_subquery()
+    statement = _upsert(db).from_select(
+        ["garage_id", "day", "requests"],
+        select(Garages.garage_id, literal(day, Date), literal(count, Integer)).where(
+            Garages.garage_id == garage_id, Garages.capacity >= count
+        ),
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[GarageDailyBookings.garage_id, GarageDailyBookings.day],
+        set_={"requests": GarageDailyBookings.requests + count},
+        where=GarageDailyBookings.requests + count <= capacity,
+    ).returning(GarageDailyBookings.requests)
+    return db.execute(statement).first() is not None
+
+
+def _slots(counts: dict[tuple[int, date], int]):
+    """
+    counts as a (garage_id, day, requests) subquery, in (garage, day) order.
+    """
+    return union_all(*(
+        select(literal(garage_id, Integer).label("garage_id"),
+               literal(day, Date).label("day"),
+               literal(counts[garage_id, day], Integer).label("requests"))
+        for garage_id, day in sorted(counts)
+    )).subquery()
+
+
+def _reserve_whole(db: Session,
+                   counts: dict[tuple[int, date], int]) -> set[tuple[int, date]]:
+    """
+    reserve_booking for many (garage, day) counters in one statement; returns
+    the slots whose whole count was reserved.
+    """
+    if not counts:
+        return set()
+    slots = _slots(counts)
+    # Rows are written in (garage, day) order, so concurrent calls lock shared
+    # counters in the same order and can't deadlock each other.
+    statement = _upsert(db).from_select(
+        ["garage_id", "day", "requests"],
+        select(slots.c.garage_id, slots.c.day, slots.c.requests)
+        .join(Garages, Garages.garage_id == slots.c.garage_id)
+        .where(Garages.capacity >= slots.c.requests)
+        .order_by(slots.c.garage_id, slots.c.day),
+    )
+    # Spelled out: a subquery can't correlate to the excluded pseudo-table.
+    capacity = select(Garages.capacity).where(
+        Garages.garage_id == literal_column("excluded.garage_id", Integer)
+    ).scalar_subquery()
+    statement = statement.on_conflict_do_update(
+        index_elements=[GarageDailyBookings.garage_id, GarageDailyBookings.day],
+        set_={"requests": GarageDailyBookings.requests + statement.excluded.requests},
+        where=GarageDailyBookings.requests + statement.excluded.requests <= capacity,
+    ).returning(GarageDailyBookings.garage_id, GarageDailyBookings.day)
+    return {(row.garage_id, row.day) for row in db.execute(statement)}
+
+
+def reserve_bookings(db: Session,
+                     counts: dict[tuple[int, date], int]) -> dict[tuple[int, date], int]:
+    """
+    Reserves as many of counts[(garage, day)] requests as still fit on each
+    counter; returns how many were reserved per (garage, day).
+
+    Slots that fit as a whole are reserved by one statement. Only when some
+    don't, their free places are read and reserved by one more; a slot that
+    fills up in between gets nothing, so capacity is never exceeded.
+    """
+    reserved = dict.fromkeys(counts, 0)
+    for slot in _reserve_whole(db, counts):
+        reserved[slot] = counts[slot]
+    rest = {slot: count for slot, count in counts.items() if not reserved[slot]}
+    if not rest:
+        return reserved
+
+    slots = _slots(rest)
+    free = {(row.garage_id, row.day): row.free for row in db.execute(
+        select(slots.c.garage_id, slots.c.day,
+               (Garages.capacity - func.coalesce(GarageDailyBookings.requests, 0))
+               .label("free"))
+        .join(Garages, Garages.garage_id == slots.c.garage_id)
+        .outerjoin(GarageDailyBookings,
+                   and_(GarageDailyBookings.garage_id == slots.c.garage_id,
+                        GarageDailyBookings.day == slots.c.day))
+    )}
+    partial = {slot: min(count, free[slot]) for slot, count in rest.items()
+               if free.get(slot, 0) > 0}
+    for slot in _reserve_whole(db, partial):
+        reserved[slot] = partial[slot]
+    return reserved
+
+
+def move_booking(db: Session, old_garage_id: int, old_day: date,
+                 new_garage_id: int, new_day: date) -> bool:
+    """
+    Moves one request between counters when a maintenance is rescheduled;
+    returns False, leaving both counters untouched, if the new day is full.
+    """
+    if (old_garage_id, old_day) == (new_garage_id, new_day):
+        return True
+    # Both counters are locked in (garage, day) order before either changes,
+    # so opposite moves between the same two days can't deadlock.
+    db.execute(select(GarageDailyBookings.garage_id).where(
+        tuple_(GarageDailyBookings.garage_id, GarageDailyBookings.day).in_(
+            [(old_garage_id, old_day), (new_garage_id, new_day)]
+        )
+    ).order_by(GarageDailyBookings.garage_id, GarageDailyBookings.day).with_for_update())
+    if not reserve_booking(db, new_garage_id, new_day):
+        return False
+    record_booking(db, old_garage_id, old_day, -1)
+    return True
+
+
+def rebuild(db: Session, garage_id: int | None = None) -> int:
+    """
+    Recomputes the rollup from maintenances, for one garage or all of them.
+    Returns the number of (garage, day) rows written.
+
+    Refuses once maintenances partitions have been archived: their rows are
+    gone, and recounting would drop their days from the reports.
+    """
+    if archived := archived_partitions(db):
+        raise RuntimeError(
+            f"{len(archived)} maintenances partitions have been archived "
+            f"({archived[0]} to {archived[-1]}); rebuilding would drop their days "
+            f"from garage_daily_bookings."
+        )
+    clear = delete(GarageDailyBookings)
+    counts = select(
+        Maintenances.garage_id,
+        Maintenances.scheduled_date,
+        func.count(Maintenances.maintenance_id),
+    ).group_by(Maintenances.garage_id, Maintenances.scheduled_date)
+    if garage_id is not None:
+        clear = clear.where(GarageDailyBookings.garage_id == garage_id)
+        counts = counts.where(Maintenances.garage_id == garage_id)
+
+    # Block maintenance writes until commit so no booking slips between the
+    # delete and the recount.
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("LOCK TABLE maintenances IN SHARE MODE"))
+    db.execute(clear)
+    result = db.execute(_upsert(db).from_select(
+        ["garage_id", "day", "requests"], counts
+    ))
+    return result.rowcount
+
+
+def main():
+    from orm.db_session import get_db_session
+
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = subcommands.add_parser("rebuild", help="recompute the rollup")
+    rebuild_parser.add_argument("--garage-id", type=int, default=None)
+    args = parser.parse_args()
+
+    try:
+        with get_db_session() as session:
+            rows = rebuild(session, args.garage_id)
+    except RuntimeError as e:
+        parser.exit(1, f"{e}\n")
+    print(f"Rebuilt garage_daily_bookings: {rows} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,15 @@
-from datetime import datetime
+from datetime import datetime, date
 from fastapi.exceptions import HTTPException
-from sqlalchemy import Integer, String, Date, ForeignKey
+from sqlalchemy import Integer, String, Date, ForeignKey, Index, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, mapped_column, Mapped, Session
 
 Base = declarative_base()
 
+# Text searched by /cars/search; queries must repeat this exact expression for
+# the trigram index below to be used.
+CAR_SEARCH_DOCUMENT = "lower(make || ' ' || model || ' ' || coalesce(license_plate, ''))"
+
 
 class CarGarageAssociations(Base):
     """Association table for many-to-many relationship between cars and garages"""
@@ -14,6 +18,10 @@ class CarGarageAssociations(Base):
     garage_id: Mapped[int] = mapped_column(ForeignKey("garages.garage_id"),
                                            primary_key=True)
 
+    __table_args__ = (
+        Index("ix_car_garage_garage_id_car_id", "garage_id", "car_id"),
+    )
+
 
 class Garages(Base):
     __tablename__ = "garages"
@@ -33,6 +41,11 @@ class Garages(Base):
     )
     maintenances = relationship("Maintenances", back_populates="garage")
 
+    __table_args__ = (
+        Index("ix_garages_city_trgm", "city", postgresql_using="gin",
+              postgresql_ops={"city": "gin_trgm_ops"}),
+    )
+
 
 class Cars(Base):
     __tablename__ = "cars"
@@ -51,6 +64,13 @@ class Cars(Base):
     )
     maintenances = relationship("Maintenances", back_populates="car")
 
+    __table_args__ = (
+        Index("ix_cars_make_trgm", "make", postgresql_using="gin",
+              postgresql_ops={"make": "gin_trgm_ops"}),
+        Index("ix_cars_search_trgm", text(f"({CAR_SEARCH_DOCUMENT}) gist_trgm_ops"),
+              postgresql_using="gist").ddl_if(dialect="postgresql"),
+    )
+
 
 class Maintenances(Base):
     __tablename__ = "maintenances"
@@ -66,3 +86,21 @@ class Maintenances(Base):
 
     car = relationship("Cars", back_populates="maintenances")
     garage = relationship("Garages", back_populates="maintenances")
+
+    __table_args__ = (
+        Index("ix_maintenances_garage_id_scheduled_date", "garage_id", "scheduled_date"),
+        Index("ix_maintenances_car_id", "car_id"),
+        Index("ix_maintenances_scheduled_date_maintenance_id", "scheduled_date",
+              "maintenance_id"),
+    )
+
+
+class GarageDailyBookings(Base):
+    """Number of maintenance requests per garage and day, kept in step with maintenances"""
+    __tablename__ = "garage_daily_bookings"
+
+    garage_id: Mapped[int] = mapped_column(
+        ForeignKey("garages.garage_id", ondelete="CASCADE"), primary_key=True
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    requests: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -0,0 +1,157 @@
+"""
+Monthly partitions of the maintenances table (Postgres, migration 0005).
+
+    python -m orm.partitions create --months-ahead 3
+    python -m orm.partitions archive --before 2024-01 --directory archive/
+
+create adds the partitions for the coming months. Run it from a scheduled
+job (monthly is enough with the default three months ahead) or as a deploy
+step; with MAINTENANCE_PARTITIONS_ON_STARTUP=true every worker's lifespan
+runs it as well. archive writes every monthly partition that ends on or before the first
+day of --before to a gzip-compressed CSV file, then detaches and drops it.
+garage_daily_bookings keeps the archived days, so the reports still count
+them. Archived partitions are recorded in maintenance_archives (migration
+0006), and orm.booking_rollup rebuild refuses to run once there are any, as
+it would drop those days.
+"""
+import argparse
+import gzip
+import os
+import re
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+MONTHS_AHEAD = int(os.getenv("MAINTENANCE_PARTITION_MONTHS_AHEAD", "3"))
+PARTITION_NAME = re.compile(r"^maintenances_(\d{4})_(\d{2})$")
+
+
+def is_partitioned(db: Session) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return db.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+        "WHERE partrelid = to_regclass('maintenances'))"
+    )).scalar()
+
+
+def create_future_partitions(db: Session, months_ahead: int = MONTHS_AHEAD) -> int:
+    """
+    Makes sure the partitions from the current month through months_ahead
+    months later exist; returns how many were created.
+    """
+    if not is_partitioned(db):
+        return 0
+    # Concurrent runs, e.g. workers started with MAINTENANCE_PARTITIONS_ON_STARTUP,
+    # create the partitions one at a time.
+    db.execute(text("SELECT pg_advisory_xact_lock(hashtext('maintenances_partitions'))"))
+    return db.execute(text("SELECT create_maintenance_partitions(:first, :months)"),
+                      {"first": date.today().replace(day=1),
+                       "months": months_ahead + 1}).scalar()
+
+
+def monthly_partitions(db: Session) -> list[tuple[str, date]]:
+    """
+    Attached monthly partitions with the first day of their month, oldest first.
+    """
+    names = db.scalars(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = to_regclass('maintenances')"
+    ))
+    partitions = []
+    for name in names:
+        if match := PARTITION_NAME.match(name):
+            partitions.append((name, date(int(match[1]), int(match[2]), 1)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def archived_partitions(db: Session) -> list[str]:
+    """
+    Partitions written out by archive_partitions(), oldest first.
+    """
+    if not is_partitioned(db) or \
+            db.execute(text("SELECT to_regclass('maintenance_archives')")).scalar() is None:
+        return []
+    return list(db.scalars(text("SELECT partition FROM maintenance_archives ORDER BY month")))
+
+
+def _export(db: Session, name: str, path: str):
+    """
+    Copies the partition to path as gzip-compressed CSV. The file is written
+    under a temporary name, synced to disk and renamed into place, so path is
+    only ever a complete file and survives a crash right after.
+    """
+    partial = f"{path}.partial"
+    with db.connection().connection.cursor() as cursor, open(partial, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as file:
+            cursor.copy_expert(f'COPY "{name}" TO STDOUT WITH (FORMAT csv, HEADER)', file)
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(partial, path)
+    directory = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+
+
+def archive_partitions(db: Session, before: date, directory: str,
+                       keep_tables: bool = False) -> list[str]:
+    """
+    Writes every monthly partition of a month before `before` to
+    <directory>/<partition>.csv.gz, then detaches it and (unless keep_tables)
+    drops it. Returns the written file paths.
+    """
+    if not is_partitioned(db):
+        raise RuntimeError("maintenances is not partitioned; run the 0005 migration.")
+    os.makedirs(directory, exist_ok=True)
+    archived = []
+    for name, month in monthly_partitions(db):
+        if month >= before.replace(day=1):
+            break
+        path = os.path.join(directory, f"{name}.csv.gz")
+        # The file is on disk before the partition is touched.
+        _export(db, name, path)
+        db.execute(text("INSERT INTO maintenance_archives (partition, month, path) "
+                        "VALUES (:partition, :month, :path)"),
+                   {"partition": name, "month": month, "path": os.path.abspath(path)})
+        db.execute(text(f'ALTER TABLE maintenances DETACH PARTITION "{name}"'))
+        if not keep_tables:
+            db.execute(text(f'DROP TABLE "{name}"'))
+        db.commit()
+        archived.append(path)
+    return archived
+
+
+def main():
+    from orm.db_session import get_db_session
+
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    create_parser = subcommands.add_parser("create", help="add upcoming partitions")
+    create_parser.add_argument("--months-ahead", type=int, default=MONTHS_AHEAD)
+    archive_parser = subcommands.add_parser("archive",
+                                            help="archive and drop old partitions")
+    archive_parser.add_argument("--before", required=True,
+                                type=lambda value: date.fromisoformat(f"{value}-01"),
+                                help="first month (YYYY-MM) to keep")
+    archive_parser.add_argument("--directory", required=True)
+    archive_parser.add_argument("--keep-tables", action="store_true",
+                                help="detach the partitions but keep them as tables")
+    args = parser.parse_args()
+
+    with get_db_session() as session:
+        if args.command == "create":
+            created = create_future_partitions(session, args.months_ahead)
+            print(f"Created {created} maintenances partitions")
+        else:
+            for path in archive_partitions(session, args.before, args.directory,
+                                           args.keep_tables):
+                print(f"Archived {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import logging
+import threading
+import time
+from typing import Callable
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+logger = logging.getLogger(__name__)
+
+
+class PoolStats:
+    """
+    Counters describing how requests compete for pooled connections.
+    """
+
+    def __init__(self, wait_warn_seconds: float):
+        self.wait_warn_seconds = wait_warn_seconds
+        # Called after every checkout, checkin and change of the waiting count.
+        self.observers: list[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.waiting = 0
+        self.slow_waits = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _changed(self):
+        for observer in self.observers:
+            observer()
+
+    def start_wait(self):
+        with self._lock:
+            self.waiting += 1
+        self._changed()
+
+    def end_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.waiting -= 1
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+            slow = seconds >= self.wait_warn_seconds
+            if slow:
+                self.slow_waits += 1
+        self._changed()
+        if slow:
+            logger.warning(
+                "Waited %.1f ms for a pooled connection (waiting=%d, timed_out=%s)",
+                seconds * 1000, self.waiting, timed_out,
+            )
+
+    def abort_wait(self):
+        with self._lock:
+            self.waiting -= 1
+        self._changed()
+
+    def record_checkin(self):
+        with self._lock:
+            self.checkins += 1
+        self._changed()
+
+    def snapshot(self, pool: QueuePool) -> dict:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "poolSize": pool.size(),
+                "checkedOut": pool.checkedout(),
+                "checkedIn": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "waiting": self.waiting,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "timeouts": self.timeouts,
+                "slowWaits": self.slow_waits,
+                "avgWaitMs": (self.total_wait_seconds / attempts * 1000)
+                if attempts else 0.0,
+                "maxWaitMs": self.max_wait_seconds * 1000,
+            }
+
+
+class _TimedPoolMixin:
+    """
+    Times every checkout so queuing on the pool shows up in PoolStats.
+    """
+    stats: PoolStats | None = None
+
+    def _do_get(self):
+        if self.stats is None:
+            return super()._do_get()
+        self.stats.start_wait()
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.end_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        except Exception:
+            self.stats.abort_wait()
+            raise
+        self.stats.end_wait(time.perf_counter() - start)
+        return connection
+
+    def _do_return_conn(self, record):
+        # Recorded once the connection is back, or its overflow slot closed.
+        super()._do_return_conn(record)
+        if self.stats is not None:
+            self.stats.record_checkin()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
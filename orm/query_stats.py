@@ -0,0 +1,84 @@
+import time
+from contextvars import ContextVar
+from typing import Callable
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_current_stats: ContextVar["RequestQueryStats | None"] = ContextVar("request_query_stats",
+                                                                   default=None)
+# Called with (statement, seconds) for every statement, inside a request or not.
+statement_observers: list[Callable[[str, float], None]] = []
+
+
+class RequestQueryStats:
+    """
+    SQL statements executed while serving one request.
+    """
+    __slots__ = ("count", "db_seconds", "slowest_seconds", "slowest_statement", "shapes")
+
+    def __init__(self):
+        self.count = 0
+        self.db_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement = None
+        self.shapes: dict[str, int] = {}
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.db_seconds += seconds
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+        # Statements are compiled with bound parameters, so the text is the shape.
+        self.shapes[statement] = self.shapes.get(statement, 0) + 1
+
+    def repeated(self, threshold: int) -> dict[str, int]:
+        """
+        Statement shapes executed more than threshold times (likely N+1).
+        """
+        return {statement: count for statement, count in self.shapes.items()
+                if count > threshold}
+
+
+def begin_request():
+    """
+    Starts collecting statements for the current request; returns the stats
+    and a token for end_request.
+    """
+    stats = RequestQueryStats()
+    return stats, _current_stats.set(stats)
+
+
+def end_request(token):
+    _current_stats.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if statement_observers or _current_stats.get() is not None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not conn.info.get("query_start_time"):
+        return
+    seconds = time.perf_counter() - conn.info["query_start_time"].pop()
+    if (stats := _current_stats.get()) is not None:
+        stats.record(statement, seconds)
+    for observer in statement_observers:
+        observer(statement, seconds)
+
+
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start_time"):
+        connection.info["query_start_time"].pop()
+
+
+def install(engine: Engine):
+    """
+    Registers the timing hooks on a (sync) engine.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
@@ -0,0 +1,145 @@
+import logging
+import threading
+import time
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+logger = logging.getLogger(__name__)
+
+# Replay lag in seconds; a standby that has replayed everything it received
+# reports 0 even when the primary has been idle for a while.
+LAG_QUERY = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() "
+    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+def _measure_lag(connection: Connection) -> float:
+    if connection.dialect.name != "postgresql":
+        # Stand-ins such as a second SQLite file have no replication to lag behind.
+        connection.execute(text("SELECT 1"))
+        return 0.0
+    return float(connection.execute(LAG_QUERY).scalar())
+
+
+class Replica:
+    """
+    A read replica with its engines and the outcome of its last lag check.
+    """
+
+    def __init__(self, name: str, engine: Engine, async_engine: AsyncEngine | None):
+        self.name = name
+        self.engine = engine
+        self.async_engine = async_engine
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False,
+                                            bind=engine)
+        self.async_session_factory = async_sessionmaker(bind=async_engine,
+                                                        autoflush=False)
+        self.lag_seconds: float | None = None
+        self.error: str | None = None
+        self.checked_at = 0.0
+
+    def _record(self, lag_seconds: float | None, error: Exception | None = None):
+        if error is not None and self.error is None:
+            logger.warning("Replica %s unreachable, reads fall back to the primary: %s",
+                           self.name, error)
+        self.lag_seconds = lag_seconds
+        self.error = None if error is None else str(error)
+
+    def check(self):
+        try:
+            with self.engine.connect() as connection:
+                self._record(_measure_lag(connection))
+        except Exception as e:
+            self._record(None, e)
+
+    async def check_async(self):
+        try:
+            async with self.async_engine.connect() as connection:
+                self._record(await connection.run_sync(_measure_lag))
+        except Exception as e:
+            self._record(None, e)
+
+    def usable(self, max_lag_seconds: float) -> bool:
+        return self.lag_seconds is not None and self.lag_seconds <= max_lag_seconds
+
+
+class ReplicaSet:
+    """
+    Hands out read replicas round-robin, skipping those that are unreachable
+    or lag more than max_lag_seconds behind the primary.
+
+    Each replica's lag is checked at most once per check_interval_seconds by
+    whichever request claims the check first; concurrent requests use the last
+    known result. When no replica qualifies, choose() returns None and the
+    caller reads from the primary.
+    """
+
+    def __init__(self, replicas: list[Replica], max_lag_seconds: float,
+                 check_interval_seconds: float):
+        self.replicas = replicas
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self._lock = threading.Lock()
+        self._next = 0
+        self.routed = 0
+        self.fallbacks = 0
+
+    def __bool__(self):
+        return bool(self.replicas)
+
+    def _rotation(self) -> list[Replica]:
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % len(self.replicas)
+        return self.replicas[start:] + self.replicas[:start]
+
+    def _claim_check(self, replica: Replica) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if now - replica.checked_at < self.check_interval_seconds:
+                return False
+            replica.checked_at = now
+            return True
+
+    def _count(self, replica: Replica | None) -> Replica | None:
+        with self._lock:
+            if replica is None:
+                self.fallbacks += 1
+            else:
+                self.routed += 1
+        return replica
+
+    def choose(self) -> Replica | None:
+        for replica in self._rotation():
+            if self._claim_check(replica):
+                replica.check()
+            if replica.usable(self.max_lag_seconds):
+                return self._count(replica)
+        return self._count(None)
+
+    async def choose_async(self) -> Replica | None:
+        for replica in self._rotation():
+            if self._claim_check(replica):
+                await replica.check_async()
+            if replica.usable(self.max_lag_seconds):
+                return self._count(replica)
+        return self._count(None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "maxLagSeconds": self.max_lag_seconds,
+                "routed": self.routed,
+                "fallbacks": self.fallbacks,
+                "replicas": [{
+                    "name": replica.name,
+                    "lagSeconds": replica.lag_seconds,
+                    "usable": replica.usable(self.max_lag_seconds),
+                    "error": replica.error,
+                } for replica in self.replicas],
+            }
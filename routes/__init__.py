@@ -1,3 +1,4 @@
 from routes.cars import car_router
 from routes.garages import garage_router
 from routes.maintenances import maintenances_router
+from routes.admin import admin_router
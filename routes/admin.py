@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Request
+
+from orm.db_session import pool_stats, active_pool, replicas
+from routes.admission import limiters
+from routes.entity_cache import entity_cache
+from routes.report_cache import report_cache
+
+admin_router = APIRouter()
+
+
+@admin_router.get("/admin/pool")
+def get_pool_stats():
+    return pool_stats.snapshot(active_pool())
+
+
+@admin_router.get("/admin/cache")
+def get_cache_stats():
+    return {"entities": entity_cache.stats(), "reports": report_cache.stats()}
+
+
+@admin_router.get("/admin/replicas")
+def get_replica_stats():
+    return replicas.stats()
+
+
+@admin_router.get("/admin/admission")
+def get_admission_stats():
+    return {name: limiter.stats() for name, limiter in limiters.items()}
+
+
+@admin_router.get("/admin/startup")
+def get_startup_timings(request: Request):
+    timings = getattr(request.app.state, "startup", None)
+    return timings.marks if timings is not None else {}
@@ -0,0 +1,170 @@
+import asyncio
+import math
+import os
+from typing import Callable
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+
+# Paths of the expensive GET routes; every other GET is a point lookup and
+# every other method a write.
+REPORT_PATHS = {
+    "/garages/dailyAvailabilityReport",
+    "/garages/availabilityMatrix",
+    "/maintenance/monthlyRequestsReport",
+    "/maintenance/nextAvailable",
+}
+LIST_PATHS = {"/cars", "/cars/search", "/garages", "/maintenance", "/maintenance/export"}
+
+# Per-route limits by tier: concurrent requests, then requests allowed to wait.
+# They keep one busy route from starving the others; what the pool can take is
+# enforced by the read limiter below, not by these.
+TIER_LIMITS = {
+    "report": (int(os.getenv("ADMISSION_REPORT_CONCURRENCY", "2")),
+               int(os.getenv("ADMISSION_REPORT_QUEUE", "4"))),
+    "list": (int(os.getenv("ADMISSION_LIST_CONCURRENCY", "4")),
+             int(os.getenv("ADMISSION_LIST_QUEUE", "8"))),
+    "lookup": (int(os.getenv("ADMISSION_LOOKUP_CONCURRENCY", "16")),
+               int(os.getenv("ADMISSION_LOOKUP_QUEUE", "32"))),
+    "write": (int(os.getenv("ADMISSION_WRITE_CONCURRENCY", "8")),
+              int(os.getenv("ADMISSION_WRITE_QUEUE", "32"))),
+}
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+ADMISSION_QUEUE_TIMEOUT_MS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_MS", "500"))
+ADMISSION_RETRY_AFTER_SECONDS = max(math.ceil(ADMISSION_QUEUE_TIMEOUT_MS / 1000), 1)
+# Every GET also holds a slot of one limiter shared by all read routes, sized
+# to the pool less this many connections kept free for writes.
+ADMISSION_WRITE_RESERVE = int(os.getenv("ADMISSION_WRITE_RESERVE", "4"))
+ADMISSION_READ_QUEUE = int(os.getenv("ADMISSION_READ_QUEUE", "32"))
+READS = "GET *"
+
+# Called with (route, reason) for every shed request.
+shed_observers: list[Callable[[str, str], None]] = []
+
+
+class AdmissionLimiter:
+    """
+    Admits at most max_concurrent requests at a time. Up to max_queue more
+    wait for a slot, each for at most queue_timeout seconds; the rest are shed.
+
+    Only touched from the event loop, so the counters need no lock.
+    """
+
+    def __init__(self, route: str, tier: str, max_concurrent: int, max_queue: int,
+                 queue_timeout: float):
+        self.route = route
+        self.tier = tier
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = {"queueFull": 0, "queueTimeout": 0}
+
+    def _reject(self, reason: str) -> bool:
+        self.shed[reason] += 1
+        for observer in shed_observers:
+            observer(self.route, reason)
+        return False
+
+    async def acquire(self) -> bool:
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queue:
+                return self._reject("queueFull")
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                return self._reject("queueTimeout")
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        self.in_flight += 1
+        self.admitted += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "tier": self.tier,
+            "maxConcurrent": self.max_concurrent,
+            "maxQueue": self.max_queue,
+            "inFlight": self.in_flight,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+        }
+
+
+limiters: dict[str, AdmissionLimiter] = {}
+
+
+def configure_reads(pool_connections: int):
+    """
+    Sizes the limiter shared by every read route from the connections a
+    worker's pool can hand out, pool_size plus max_overflow.
+    """
+    if ADMISSION_ENABLED:
+        limiters[READS] = AdmissionLimiter(
+            READS, "read", max(pool_connections - ADMISSION_WRITE_RESERVE, 1),
+            ADMISSION_READ_QUEUE, queue_timeout=ADMISSION_QUEUE_TIMEOUT_MS / 1000,
+        )
+
+
+def _tier(path: str, methods: set[str]) -> str:
+    if "GET" not in methods:
+        return "write"
+    if path in REPORT_PATHS:
+        return "report"
+    if path in LIST_PATHS:
+        return "list"
+    return "lookup"
+
+
+class AdmissionRoute(APIRoute):
+    """
+    APIRoute that passes requests through the route's AdmissionLimiter, and
+    for reads the shared one, before any dependency runs, so shed requests
+    never wait for a pooled connection. The slots are held until the
+    response, streaming included, has been sent.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, endpoint, **kwargs)
+        self.limiter = None
+        if ADMISSION_ENABLED:
+            name = f"{','.join(sorted(self.methods))} {self.path}"
+            tier = _tier(self.path, self.methods)
+            self.limiter = limiters[name] = AdmissionLimiter(
+                name, tier, *TIER_LIMITS[tier],
+                queue_timeout=ADMISSION_QUEUE_TIMEOUT_MS / 1000,
+            )
+
+    async def handle(self, scope, receive, send):
+        if self.limiter is None:
+            await super().handle(scope, receive, send)
+            return
+        gates = [self.limiter]
+        if self.limiter.tier != "write" and (reads := limiters.get(READS)) is not None:
+            gates.append(reads)
+        admitted = []
+        try:
+            for gate in gates:
+                if not await gate.acquire():
+                    response = JSONResponse(
+                        {"detail": "Server is overloaded, retry later."}, status_code=503,
+                        headers={"Retry-After": str(ADMISSION_RETRY_AFTER_SECONDS)},
+                    )
+                    await response(scope, receive, send)
+                    return
+                admitted.append(gate)
+            await super().handle(scope, receive, send)
+        finally:
+            for gate in admitted:
+                gate.release()
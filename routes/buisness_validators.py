@@ -1,9 +1,12 @@
-from typing import Type
+from datetime import date, datetime
+from typing import Iterable, Type
 
 from fastapi.exceptions import HTTPException
-from sqlalchemy.orm import Session, Mapped
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session, Mapped, selectinload
 
 from orm import Cars, Garages, Maintenances
+from routes.bulk import chunked
 
 
 class CarValidators:
@@ -34,16 +37,55 @@ class CarValidators:
         return garages
 
     @staticmethod
-    def validate_car_id(car_id: int | Mapped[int], db: Session) -> Type[Cars] | None:
+    def existing_license_plates(license_plates: list[str], db: Session) -> set[str]:
+        """
+        Returns which of the given license plates are already taken.
+        """
+        taken = set()
+        for batch in chunked(set(license_plates)):
+            taken.update(db.scalars(
+                select(Cars.license_plate).where(Cars.license_plate.in_(batch))
+            ))
+        return taken
+
+    @staticmethod
+    def cars_by_id(car_ids: list[int], db: Session) -> dict[int, Cars]:
+        """
+        Loads the existing cars among car_ids, keyed by id.
+        """
+        cars = {}
+        for batch in chunked(set(car_ids)):
+            cars.update((car.car_id, car) for car in
+                        db.scalars(select(Cars).where(Cars.car_id.in_(batch))))
+        return cars
+
+    @staticmethod
+    def validate_car_id(car_id: int | Mapped[int], db: Session,
+                        load_garages: bool = False) -> Type[Cars] | None:
         """
         Validates if a car ID exists in the database.
+        With load_garages the car's garages are fetched in the same call.
         """
-        if car := db.query(Cars).filter_by(car_id=car_id).first():
+        query = db.query(Cars).filter_by(car_id=car_id)
+        if load_garages:
+            query = query.options(selectinload(Cars.garages))
+        if car := query.first():
             return car
         else:
             raise HTTPException(status_code=404, detail="Car not found.")
 
 class GarageValidators:
+    @staticmethod
+    def garages_by_id(garage_ids: list[int], db: Session) -> dict[int, Garages]:
+        """
+        Loads the existing garages among garage_ids, keyed by id.
+        """
+        garages = {}
+        for batch in chunked(set(garage_ids)):
+            garages.update((garage.garage_id, garage) for garage in
+                           db.scalars(select(Garages).where(Garages.garage_id.in_(batch))))
+        return garages
+
     @staticmethod
     def validate_garage_id(garage_id: int | Mapped[int], db: Session) -> Type[Garages] | None:
         """
@@ -65,3 +107,198 @@ class MaintenanceValidators:
             return maintenance
         else:
             raise HTTPException(status_code=404, detail="Maintenance not found.")
+
+    @staticmethod
+    def validate_scheduled_date(scheduled_date: str) -> date:
+        """
+        Validates that a scheduled date is given as YYYY-MM-DD.
+        """
+        try:
+            return datetime.strptime(scheduled_date, "%Y-%m-%d").date()
+        except ValueError as e:
+            raise HTTPException(
+                status_code=400, detail="Invalid date format. Use YYYY-MM-DD."
+            ) from e
+
+
+class EntityLoader:
+    """
+    Request-scoped batch loader for cars, garages and maintenances.
+
+    Ids registered with prime() are fetched on the first lookup of their type,
+    with a single IN query per entity type, and every result - missing ids
+    included - is memoized for the rest of the request. Lookups raise the same
+    404/400 errors as the validators above.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._cars: dict[int, Cars | None] = {}
+        self._plates: dict[str, Cars | None] = {}
+        self._garages: dict[int, Garages | None] = {}
+        self._maintenances: dict[int, Maintenances | None] = {}
+        self._pending_cars: set[int] = set()
+        self._pending_plates: set[str] = set()
+        self._pending_garages: set[int] = set()
+        self._pending_maintenances: set[int] = set()
+
+    @classmethod
+    def of(cls, db: Session) -> "EntityLoader":
+        """
+        The loader bound to the request's session, created on first use.
+        """
+        if (loader := db.info.get("entity_loader")) is None:
+            loader = db.info["entity_loader"] = cls(db)
+        return loader
+
+    def prime(self, car_ids: Iterable[int] = (), license_plates: Iterable[str] = (),
+              garage_ids: Iterable[int] = (),
+              maintenance_ids: Iterable[int] = ()) -> "EntityLoader":
+        """
+        Registers ids the request will look up so they are fetched together.
+        """
+        self._pending_cars.update(i for i in car_ids if i not in self._cars)
+        self._pending_plates.update(p for p in license_plates if p not in self._plates)
+        self._pending_garages.update(i for i in garage_ids if i not in self._garages)
+        self._pending_maintenances.update(i for i in maintenance_ids
+                                          if i not in self._maintenances)
+        return self
+
+    def _remember_car(self, car: Cars):
+        self._cars[car.car_id] = car
+        self._plates[car.license_plate] = car
+
+    def _load_cars(self):
+        car_ids, self._pending_cars = self._pending_cars, set()
+        plates, self._pending_plates = self._pending_plates, set()
+        conditions = []
+        if car_ids:
+            conditions.append(Cars.car_id.in_(car_ids))
+        if plates:
+            conditions.append(Cars.license_plate.in_(plates))
+        if not conditions:
+            return
+        # A car's id and the owner of a license plate come from the same query.
+        for car in self.db.scalars(select(Cars).where(or_(*conditions))
+                                   .options(selectinload(Cars.garages))):
+            self._remember_car(car)
+        self._cars.update((car_id, None) for car_id in car_ids - self._cars.keys())
+        self._plates.update((plate, None) for plate in plates - self._plates.keys())
+
+    def _load_garages(self):
+        garage_ids, self._pending_garages = self._pending_garages, set()
+        if not garage_ids:
+            return
+        self._garages.update((garage.garage_id, garage) for garage in self.db.scalars(
+            select(Garages).where(Garages.garage_id.in_(garage_ids))
+        ))
+        self._garages.update((garage_id, None) for garage_id in
+                             garage_ids - self._garages.keys())
+
+    def _load_maintenances(self, with_references: bool):
+        maintenance_ids, self._pending_maintenances = self._pending_maintenances, set()
+        if not maintenance_ids:
+            return
+        if with_references:
+            # The maintenance's car and garage come back in the same round trip.
+            rows = self.db.execute(
+                select(Maintenances, Cars, Garages)
+                .outerjoin(Cars, Maintenances.car_id == Cars.car_id)
+                .outerjoin(Garages, Maintenances.garage_id == Garages.garage_id)
+                .where(Maintenances.maintenance_id.in_(maintenance_ids))
+            ).all()
+            for maintenance, car, garage in rows:
+                self._maintenances[maintenance.maintenance_id] = maintenance
+                if car is not None:
+                    self._remember_car(car)
+                else:
+                    self._cars.setdefault(maintenance.car_id, None)
+                self._garages.setdefault(maintenance.garage_id, garage)
+        else:
+            self._maintenances.update(
+                (maintenance.maintenance_id, maintenance) for maintenance in
+                self.db.scalars(select(Maintenances).where(
+                    Maintenances.maintenance_id.in_(maintenance_ids)
+                ))
+            )
+        self._maintenances.update((maintenance_id, None) for maintenance_id in
+                                  maintenance_ids - self._maintenances.keys())
+
+    def car(self, car_id: int, for_update: bool = False) -> Cars:
+        """
+        With for_update the car and its garages are read again and the car row
+        is locked until commit, so updates of the same car take turns.
+        """
+        if for_update:
+            car = self.db.scalars(
+                select(Cars).where(Cars.car_id == car_id)
+                .options(selectinload(Cars.garages))
+                .with_for_update(of=Cars).execution_options(populate_existing=True)
+            ).one_or_none()
+            self._pending_cars.discard(car_id)
+            if car is None:
+                self._cars[car_id] = None
+            else:
+                self._remember_car(car)
+        self.prime(car_ids=[car_id])
+        self._load_cars()
+        if (car := self._cars[car_id]) is None:
+            raise HTTPException(status_code=404, detail="Car not found.")
+        return car
+
+    def validate_license_plate(self, license_plate: str, car_id: int = None):
+        """
+        Raises when the license plate belongs to a car other than car_id.
+        """
+        self.prime(license_plates=[license_plate])
+        self._load_cars()
+        owner = self._plates[license_plate]
+        if owner is not None and owner.car_id != car_id:
+            raise HTTPException(status_code=400, detail="License plate already exists.")
+
+    def garage(self, garage_id: int) -> Garages:
+        self.prime(garage_ids=[garage_id])
+        self._load_garages()
+        if (garage := self._garages[garage_id]) is None:
+            raise HTTPException(status_code=404, detail="Garage not found.")
+        return garage
+
+    def existing_garages(self, garage_ids: list[int]) -> dict[int, Garages]:
+        """
+        The existing garages among garage_ids, keyed by id.
+        """
+        self.prime(garage_ids=garage_ids)
+        self._load_garages()
+        return {garage_id: self._garages[garage_id] for garage_id in garage_ids
+                if self._garages[garage_id] is not None}
+
+    def garages(self, garage_ids: list[int]) -> list[Garages]:
+        """
+        All of garage_ids, raising 404 when any of them does not exist.
+        """
+        garages = self.existing_garages(garage_ids)
+        if len(garages) != len(set(garage_ids)):
+            raise HTTPException(status_code=404,
+                                detail="One or more garages not found.")
+        return [garages[garage_id] for garage_id in dict.fromkeys(garage_ids)]
+
+    def maintenance(self, maintenance_id: int, with_references: bool = False,
+                    for_update: bool = False) -> Maintenances:
+        """
+        With with_references the maintenance's car and garage are loaded by
+        the same query, so car() and garage() on them need no round trip.
+
+        With for_update the row is read again and locked until commit, so
+        writers of the same maintenance take turns and each sees what the
+        previous one committed.
+        """
+        if for_update:
+            self._maintenances[maintenance_id] = self.db.scalars(
+                select(Maintenances).where(Maintenances.maintenance_id == maintenance_id)
+                .with_for_update().execution_options(populate_existing=True)
+            ).one_or_none()
+        self.prime(maintenance_ids=[maintenance_id])
+        self._load_maintenances(with_references)
+        if (maintenance := self._maintenances[maintenance_id]) is None:
+            raise HTTPException(status_code=404, detail="Maintenance not found.")
+        return maintenance
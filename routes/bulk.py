@@ -0,0 +1,30 @@
+import os
+from itertools import islice
+from typing import Iterable, Iterator
+
+from fastapi.exceptions import HTTPException
+
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "10000"))
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "1000"))
+
+
+def chunked(items: Iterable, size: int = BULK_BATCH_SIZE) -> Iterator[list]:
+    """
+    Splits items into lists of at most size elements.
+    """
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def validate_bulk_size(items: list):
+    """
+    Rejects bulk payloads that are empty or larger than BULK_MAX_ITEMS.
+    """
+    if not items:
+        raise HTTPException(status_code=400, detail="No items given.")
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {BULK_MAX_ITEMS} items can be sent at once."
+        )
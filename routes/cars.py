@@ -1,31 +1,84 @@
+from collections import defaultdict
 from typing import List, Optional
 
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select, literal, literal_column
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.exc import StaleDataError
 from fastapi.params import Depends
-from fastapi import APIRouter
-
-from orm import Cars, CarGarageAssociations
-from models import CarsIn, CarsOut
-from routes.buisness_validators import CarValidators
-from orm.db_session import get_db
-
-car_router = APIRouter()
-
-
-@car_router.get("/cars/{car_id}", response_model=CarsOut)
-def get_car(car_id, db: Session = Depends(get_db)):
-    return CarValidators.validate_car_id(car_id, db)
-
-
-@car_router.get("/cars", response_model=List[CarsOut])
+from fastapi import Query
+from fastapi.exceptions import HTTPException
+from routes.db_router import DbRouter
+
+from orm import Cars, CarGarageAssociations, Garages
+from orm.orm_bases import CAR_SEARCH_DOCUMENT
+from models import CarsIn, CarsOut, CarsPage, CarsBulkOut, GaragesOut
+from routes.buisness_validators import CarValidators, GarageValidators, EntityLoader
+from routes.bulk import chunked, validate_bulk_size
+from routes.entity_cache import entity_cache
+from orm.db_session import get_db, read_from_primary
+from routes.fast_json import FAST_JSON, fast_page, car_item
+from routes.fieldsets import fields_query, parse_fields, requested_attributes, \
+    sparse_page
+from routes.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, \
+    build_page
+
+car_router = DbRouter()
+
+MAX_SEARCH_RESULTS = 50
+
+
+@car_router.get("/cars/search", response_model=List[CarsOut])
+def search_cars(
+        q: str = Query(..., min_length=2, max_length=100),
+        limit: int = Query(10, ge=1, le=MAX_SEARCH_RESULTS),
+        offset: int = Query(0, ge=0, le=1000),
+        db: Session = Depends(get_db)
+):
+    # Word similarity ranks prefix and whole-word matches on make, model or
+    # license plate first; both operators are served by the GiST trigram index
+    # on the search document, so the top rows come from an index scan.
+    document = literal_column(CAR_SEARCH_DOCUMENT)
+    term = literal(q.strip().lower())
+    cars = db.scalars(
+        select(Cars)
+        .where(term.op("<%")(document))
+        .order_by(term.op("<<->")(document), Cars.car_id)
+        .offset(offset)
+        .limit(limit)
+        .options(selectinload(Cars.garages))
+    ).all()
+    return cars
+
+
+@car_router.get("/cars/{car_id}", response_model=CarsOut,
+                dependencies=[Depends(read_from_primary)])
+def get_car(car_id: int, db: Session = Depends(get_db)):
+    return entity_cache.get_car(car_id, db)
+
+
+@car_router.get("/cars", response_model=CarsPage)
 def get_all_cars(
         carMake: Optional[str] = None,
         garageId: Optional[int] = None,
         fromYear: Optional[int] = None,
         toYear: Optional[int] = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
+        fields: Optional[str] = fields_query(CarsOut),
         db: Session = Depends(get_db)
 ):
-    query = db.query(Cars)
+    selected = parse_fields(fields, CarsOut)
+    if selected is None:
+        # Garages for the whole page are fetched with one IN query instead of a
+        # lazy load per car when CarsOut serializes them.
+        query = db.query(Cars).options(selectinload(Cars.garages))
+    else:
+        # Only the requested columns, plus the sort key, are read; garages are
+        # loaded below only when asked for.
+        query = db.query(Cars.car_id, *(
+            getattr(Cars, name) for name in requested_attributes(CarsOut, selected)
+            if name not in ("car_id", "garages")
+        ))
 
     if carMake:
         query = query.filter(Cars.make.ilike(f"%{carMake}%"))
@@ -36,13 +89,37 @@ def get_all_cars(
         query = query.filter(Cars.production_year >= fromYear)
     if toYear:
         query = query.filter(Cars.production_year <= toYear)
-
-    return query.all()
+    if cursor:
+        (last_car_id,) = decode_cursor(cursor, int)
+        query = query.filter(Cars.car_id > last_car_id)
+
+    rows = query.order_by(Cars.car_id).limit(limit + 1).all()
+    page = build_page(rows, limit, lambda car: (car.car_id,))
+    if selected is None:
+        return fast_page(page, car_item) if FAST_JSON else page
+
+    page["items"] = [row._asdict() for row in page["items"]]
+    if "garages" in selected:
+        garages = defaultdict(list)
+        for row in db.execute(
+                select(CarGarageAssociations.car_id, Garages.garage_id, Garages.name,
+                       Garages.location, Garages.city, Garages.capacity)
+                .join(Garages, CarGarageAssociations.garage_id == Garages.garage_id)
+                .where(CarGarageAssociations.car_id.in_(
+                    [item["car_id"] for item in page["items"]]
+                ))
+        ):
+            garages[row.car_id].append(row._asdict())
+        for item in page["items"]:
+            item["garages"] = garages[item["car_id"]]
+    return sparse_page(CarsOut, selected, page)
 
 
 @car_router.post("/cars", response_model=CarsOut)
 def create_car(car: CarsIn, db: Session = Depends(get_db)):
-    CarValidators.validate_license_plate(car.licensePlate, db)
+    loader = EntityLoader.of(db).prime(license_plates=[car.licensePlate],
+                                       garage_ids=car.garageIds)
+    loader.validate_license_plate(car.licensePlate)
     new_car = Cars(
         make=car.make,
         model=car.model,
@@ -53,19 +130,83 @@ def create_car(car: CarsIn, db: Session = Depends(get_db)):
 
     db.add(new_car)
     db.flush()
-    new_car.garages = CarValidators.validate_and_associate_garages(car.garageIds, db)
+    new_car.garages = loader.garages(car.garageIds)
 
+    new_car_id = new_car.car_id
     db.commit()
-    db.refresh(new_car)
 
-    return new_car
+    return CarValidators.validate_car_id(new_car_id, db, load_garages=True)
+
+
+@car_router.post("/cars/bulk", response_model=CarsBulkOut)
+def create_cars_bulk(cars: List[CarsIn], db: Session = Depends(get_db)):
+    validate_bulk_size(cars)
+    # All license plates and garages are checked up front with set-based queries.
+    taken_plates = CarValidators.existing_license_plates(
+        [car.licensePlate for car in cars], db
+    )
+    garages = {
+        garage_id: GaragesOut.model_validate(garage, from_attributes=True)
+        for garage_id, garage in GarageValidators.garages_by_id(
+            [garage_id for car in cars for garage_id in car.garageIds], db
+        ).items()
+    }
+
+    errors = []
+    accepted = []
+    for index, car in enumerate(cars):
+        garage_ids = list(dict.fromkeys(car.garageIds))
+        if car.licensePlate in taken_plates:
+            errors.append({"index": index, "detail": "License plate already exists."})
+        elif any(garage_id not in garages for garage_id in garage_ids):
+            errors.append({"index": index, "detail": "One or more garages not found."})
+        else:
+            taken_plates.add(car.licensePlate)
+            accepted.append((car, garage_ids))
+
+    created = []
+    for batch in chunked(accepted):
+        car_ids = db.scalars(
+            insert(Cars).returning(Cars.car_id, sort_by_parameter_order=True),
+            [{
+                "make": car.make,
+                "model": car.model,
+                "production_year": car.productionYear,
+                "license_plate": car.licensePlate,
+            } for car, _ in batch]
+        ).all()
+        associations = [
+            {"car_id": car_id, "garage_id": garage_id}
+            for car_id, (_, garage_ids) in zip(car_ids, batch)
+            for garage_id in garage_ids
+        ]
+        if associations:
+            db.execute(insert(CarGarageAssociations), associations)
+
+        created.extend({
+            "id": car_id,
+            "make": car.make,
+            "model": car.model,
+            "productionYear": car.productionYear,
+            "licensePlate": car.licensePlate,
+            "garages": [garages[garage_id] for garage_id in garage_ids],
+        } for car_id, (car, garage_ids) in zip(car_ids, batch))
+
+    db.commit()
+
+    return {"created": created, "errors": errors}
 
 
 @car_router.put("/cars/{car_id}", response_model=CarsOut)
 def update_car(car_id: int, car: CarsIn, db: Session = Depends(get_db)):
-    existing_car: Cars | None = CarValidators.validate_car_id(car_id, db)
+    # The car, the current owner of the license plate and the new garages are
+    # fetched up front: one query for cars (plus their garages), one for garages.
+    loader = EntityLoader.of(db).prime(car_ids=[car_id],
+                                       license_plates=[car.licensePlate],
+                                       garage_ids=car.garageIds)
+    existing_car: Cars = loader.car(car_id, for_update=True)
 
-    CarValidators.validate_license_plate(car.licensePlate, db, car_id)
+    loader.validate_license_plate(car.licensePlate, car_id)
 
     existing_car.make = car.make
     existing_car.model = car.model
@@ -73,18 +214,26 @@ def update_car(car_id: int, car: CarsIn, db: Session = Depends(get_db)):
     existing_car.license_plate = car.licensePlate
 
     existing_car.garages.clear()
-    existing_car.garages = CarValidators.validate_and_associate_garages(
-        car.garageIds, db
-    )
-
+    existing_car.garages = loader.garages(car.garageIds)
+
+    try:
+        db.flush()
+    except StaleDataError as e:
+        # Without row locks (SQLite) a concurrent update of the car may have
+        # replaced the garage links read above.
+        db.rollback()
+        raise HTTPException(status_code=409,
+                            detail="Car was changed by another request, retry.") from e
     db.commit()
-    db.refresh(existing_car)
+    entity_cache.invalidate_car(car_id)
 
-    return existing_car
+    return CarValidators.validate_car_id(car_id, db, load_garages=True)
 
 
 @car_router.delete("/cars/{car_id}")
 def delete_car(car_id: int, db: Session = Depends(get_db)):
-    existing_car: Cars | None = CarValidators.validate_car_id(car_id, db)
+    existing_car: Cars = EntityLoader.of(db).car(car_id)
     db.delete(existing_car)
+    db.commit()
+    entity_cache.invalidate_car(car_id)
     return True
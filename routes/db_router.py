@@ -0,0 +1,77 @@
+import functools
+import inspect
+
+from fastapi import APIRouter
+from fastapi.params import Depends
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from orm.db_session import DB_MODE, get_db, get_async_db
+from routes.report_cache import ReportCachingRoute
+
+
+class DbRouter(APIRouter):
+    """
+    APIRouter that serves the same handlers in both database modes.
+
+    Handlers are written once against a sync ``Session`` obtained through
+    ``Depends(get_db)``. When ``DB_MODE=async`` every such handler is registered
+    as a coroutine that receives an ``AsyncSession`` and runs the handler body
+    through ``AsyncSession.run_sync``, so each query awaits asyncpg on the event
+    loop instead of blocking a threadpool worker.
+
+    Routes shed load past their tier's admission limits, and the report
+    routes are served through the report cache.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("route_class", ReportCachingRoute)
+        super().__init__(**kwargs)
+
+    def add_api_route(self, path, endpoint, **kwargs):
+        if DB_MODE == "async" and _db_parameter(endpoint):
+            response_model = kwargs.get("response_model")
+            if isinstance(response_model, DefaultPlaceholder):
+                response_model = None
+            endpoint = _async_endpoint(endpoint, response_model)
+        super().add_api_route(path, endpoint, **kwargs)
+
+
+def _db_parameter(endpoint) -> inspect.Parameter | None:
+    for parameter in inspect.signature(endpoint).parameters.values():
+        if getattr(parameter.default, "dependency", None) is get_db:
+            return parameter
+    return None
+
+
+def _async_endpoint(endpoint, response_model):
+    """
+    Wrap a sync handler into a coroutine running on the async session.
+    """
+    signature = inspect.signature(endpoint)
+    db_name = _db_parameter(endpoint).name
+    parameters = [
+        parameter.replace(annotation=AsyncSession, default=Depends(get_async_db))
+        if parameter.name == db_name else parameter
+        for parameter in signature.parameters.values()
+    ]
+    adapter = TypeAdapter(response_model) if response_model else None
+
+    @functools.wraps(endpoint)
+    async def wrapper(**kwargs):
+        db: AsyncSession = kwargs.pop(db_name)
+
+        def call(session):
+            result = endpoint(**{db_name: session}, **kwargs)
+            # Serialize while still inside the greenlet so lazy relationship
+            # loads triggered by the response model can reach the database.
+            if adapter is not None and not isinstance(result, Response):
+                result = adapter.validate_python(result, from_attributes=True)
+            return result
+
+        return await db.run_sync(call)
+
+    wrapper.__signature__ = signature.replace(parameters=parameters)
+    return wrapper
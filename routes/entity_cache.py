@@ -0,0 +1,161 @@
+import os
+import threading
+
+from sqlalchemy.orm import Session
+
+from cache import CacheBackend, build_backend
+from orm import Cars, Garages
+from routes.buisness_validators import EntityLoader
+
+
+def _garage_entry(garage: Garages) -> dict:
+    return {
+        "id": garage.garage_id,
+        "name": garage.name,
+        "location": garage.location,
+        "city": garage.city,
+        "capacity": garage.capacity,
+    }
+
+
+def _car_entry(car: Cars) -> dict:
+    return {
+        "id": car.car_id,
+        "make": car.make,
+        "model": car.model,
+        "productionYear": car.production_year,
+        "licensePlate": car.license_plate,
+        "garageIds": [garage.garage_id for garage in car.garages],
+    }
+
+
+class EntityCache:
+    """
+    Read-through cache of cars and garages keyed by id.
+
+    Entries are plain dicts in the shape of CarsOut/GaragesOut. A car keeps
+    only its garage ids, so renaming a garage invalidates a single entry.
+    Misses go through the request's EntityLoader and keep its 404 semantics;
+    the GET routes reading through the cache stay on the primary
+    (read_from_primary), so a lagging replica never fills it.
+
+    Entries are only read, never trusted, by write paths: with the default
+    in-memory backend an invalidation reaches just the worker that made it,
+    and the others serve their copy until the TTL runs out.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _count(self, hits: int = 0, misses: int = 0):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def _snapshot(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def _fill(self, generation: int, entries: dict[str, dict]):
+        """
+        Stores entries loaded after generation was taken, unless an
+        invalidation ran in between: the rows may predate that write.
+
+        The backend is called outside the lock, so an invalidation can also
+        run while the entries are being stored; they are then removed again.
+        """
+        if self._snapshot() != generation:
+            return
+        for key, entry in entries.items():
+            self.backend.set(key, entry)
+        if self._snapshot() != generation:
+            self.backend.delete(*entries)
+
+    def _invalidate(self, keys: list[str]):
+        # A fill that stores its entries after this delete sees the new
+        # generation once it is done and deletes them itself.
+        with self._lock:
+            self._generation += 1
+            self.invalidations += len(keys)
+        self.backend.delete(*keys)
+
+    def get_garage(self, garage_id: int, db: Session) -> dict:
+        key = f"garage:{garage_id}"
+        if (entry := self.backend.get(key)) is not None:
+            self._count(hits=1)
+            return entry
+        self._count(misses=1)
+        generation = self._snapshot()
+        entry = _garage_entry(EntityLoader.of(db).garage(garage_id))
+        self._fill(generation, {key: entry})
+        return entry
+
+    def get_garages(self, garage_ids: list[int], db: Session) -> list[dict]:
+        """
+        Garages for the given ids, loading every miss with one IN query.
+        Ids that no longer exist are skipped.
+        """
+        entries = dict(zip(garage_ids, self.backend.get_many(
+            [f"garage:{garage_id}" for garage_id in garage_ids]
+        )))
+        missing = [garage_id for garage_id, entry in entries.items() if entry is None]
+        self._count(hits=len(entries) - len(missing), misses=len(missing))
+        if missing:
+            generation = self._snapshot()
+            loaded = EntityLoader.of(db).existing_garages(missing).values()
+            for garage in loaded:
+                entries[garage.garage_id] = _garage_entry(garage)
+            self._fill(generation, {f"garage:{garage.garage_id}": entries[garage.garage_id]
+                                    for garage in loaded})
+        return [entries[garage_id] for garage_id in garage_ids
+                if entries.get(garage_id) is not None]
+
+    def get_car(self, car_id: int, db: Session, with_garages: bool = True) -> dict:
+        key = f"car:{car_id}"
+        if (entry := self.backend.get(key)) is not None:
+            self._count(hits=1)
+        else:
+            self._count(misses=1)
+            generation = self._snapshot()
+            car = EntityLoader.of(db).car(car_id)
+            entry = _car_entry(car)
+            self._fill(generation, {key: entry} | {
+                f"garage:{garage.garage_id}": _garage_entry(garage) for garage in car.garages
+            })
+        if not with_garages:
+            return entry
+        car = {field: value for field, value in entry.items() if field != "garageIds"}
+        car["garages"] = self.get_garages(entry["garageIds"], db)
+        return car
+
+    def invalidate_car(self, *car_ids: int):
+        self._invalidate([f"car:{car_id}" for car_id in car_ids])
+
+    def invalidate_garage(self, garage_id: int):
+        self._invalidate([f"garage:{garage_id}"])
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRatio": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+        if hasattr(self.backend, "evictions"):
+            stats["evictions"] = self.backend.evictions
+            stats["entries"] = len(self.backend)
+        return stats
+
+
+entity_cache = EntityCache(build_backend(
+    os.getenv("ENTITY_CACHE_BACKEND", "memory").lower(),
+    max_entries=int(os.getenv("ENTITY_CACHE_MAX_ENTRIES", "10000")),
+    ttl_seconds=float(os.getenv("ENTITY_CACHE_TTL_SECONDS", "60")),
+))
@@ -0,0 +1,82 @@
+"""
+Fast serialization path for the list endpoints.
+
+With FAST_JSON=true the list routes build their rows directly in the output
+shape of CarsOut, GaragesOut and MaintenancesOut - same field names, order
+and value formatting - and return them as a FastJSONResponse, skipping the
+response_model validation and re-encoding done by FastAPI.
+"""
+import json
+import os
+from datetime import date, datetime, time
+from typing import Callable
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # the standard library encoder is used without orjson
+    orjson = None
+
+FAST_JSON = os.getenv("FAST_JSON", "false").lower() in ("1", "true", "yes")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Encodes already JSON-ready content with orjson when it is installed,
+    producing the same bytes as FastAPI's default JSONResponse.
+    """
+
+    def render(self, content) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content)
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None,
+                          separators=(",", ":")).encode("utf-8")
+
+
+def _datetime(value: date) -> str:
+    # MaintenancesOut declares a datetime, so dates are rendered at midnight.
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, time())
+    return value.isoformat()
+
+
+def garage_item(garage) -> dict:
+    return {
+        "id": garage.garage_id,
+        "name": garage.name,
+        "location": garage.location,
+        "city": garage.city,
+        "capacity": garage.capacity,
+    }
+
+
+def car_item(car) -> dict:
+    return {
+        "id": car.car_id,
+        "make": car.make,
+        "model": car.model,
+        "productionYear": car.production_year,
+        "licensePlate": car.license_plate,
+        "garages": [garage_item(garage) for garage in car.garages],
+    }
+
+
+def maintenance_item(row) -> dict:
+    return {
+        "id": row.maintenance_id,
+        "carId": row.carId,
+        "carName": f"{row.carMake} {row.carModel}",
+        "serviceType": row.service_type,
+        "scheduledDate": _datetime(row.scheduled_date),
+        "garageId": row.garageId,
+        "garageName": row.garageName,
+    }
+
+
+def fast_page(page: dict, item: Callable[[object], dict]) -> FastJSONResponse:
+    """
+    Renders a page built by build_page with item shaping each row.
+    """
+    return FastJSONResponse({"items": [item(row) for row in page["items"]],
+                             "nextCursor": page["nextCursor"]})
@@ -0,0 +1,64 @@
+from functools import lru_cache
+from typing import Optional, Type
+
+from fastapi import Query
+from fastapi.exceptions import HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ConfigDict, create_model
+
+
+def _aliases(model: Type[BaseModel]) -> list[str]:
+    return [info.alias or name for name, info in model.model_fields.items()]
+
+
+def fields_query(model: Type[BaseModel]):
+    """
+    The ``fields=`` query parameter of a list endpoint returning model items.
+    """
+    return Query(None, description="Comma separated subset of "
+                                   f"{', '.join(_aliases(model))} to return.")
+
+
+def parse_fields(fields: Optional[str], model: Type[BaseModel]) -> set[str] | None:
+    """
+    Validates a ``fields=`` value against the output names of model; None when
+    every field is wanted.
+    """
+    if not fields:
+        return None
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    if unknown := requested - set(_aliases(model)):
+        raise HTTPException(status_code=400,
+                            detail=f"Unknown fields: {', '.join(sorted(unknown))}.")
+    return requested
+
+
+def requested_attributes(model: Type[BaseModel], fields: set[str]) -> list[str]:
+    """
+    Field names of model whose output names are in fields, in model order.
+    """
+    return [name for name, info in model.model_fields.items()
+            if (info.alias or name) in fields]
+
+
+@lru_cache(maxsize=256)
+def _sparse_page_model(model: Type[BaseModel], fields: frozenset[str]) -> Type[BaseModel]:
+    item_model = create_model(
+        f"{model.__name__}Sparse",
+        __config__=ConfigDict(populate_by_name=True),
+        **{name: (info.annotation, info) for name, info in model.model_fields.items()
+           if (info.alias or name) in fields},
+    )
+    return create_model(f"{model.__name__}SparsePage",
+                        items=(list[item_model], ...),
+                        nextCursor=(Optional[str], None))
+
+
+def sparse_page(model: Type[BaseModel], fields: set[str], page: dict) -> JSONResponse:
+    """
+    Serializes a page whose items carry the requested fields, keyed by field
+    or output name, through a trimmed copy of model. Extra keys are dropped.
+    """
+    page_model = _sparse_page_model(model, frozenset(fields))
+    return JSONResponse(page_model.model_validate(page).model_dump(mode="json",
+                                                                   by_alias=True))
@@ -1,17 +1,57 @@
 from datetime import datetime, timedelta
-from typing import List
 
+from typing import Optional
+
+from sqlalchemy import select, cast, and_, Date
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
 from fastapi.params import Depends
-from fastapi import APIRouter
+from fastapi import Query
+from routes.db_router import DbRouter
 from fastapi.exceptions import HTTPException
 
-from orm import Garages, Maintenances
-from models import GaragesOut, GaragesIn
-from orm.db_session import get_db
-from routes.buisness_validators import GarageValidators
-
-garage_router = APIRouter()
+from orm import Garages, GarageDailyBookings, CarGarageAssociations
+from models import GaragesOut, GaragesIn, GaragesPage, AvailabilityMatrix
+from orm.db_session import get_db, read_from_primary
+from routes.buisness_validators import EntityLoader
+from routes.entity_cache import entity_cache
+from routes.report_cache import report_cache
+from routes.fast_json import FAST_JSON, fast_page, garage_item
+from routes.fieldsets import fields_query, parse_fields, requested_attributes, \
+    sparse_page
+from routes.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, \
+    build_page
+
+garage_router = DbRouter()
+
+MAX_MATRIX_DAYS = 366
+
+
+def city_is(city: str):
+    """
+    Case-insensitive match of the garage's city, with % and _ in city taken
+    literally rather than as LIKE wildcards.
+    """
+    escaped = city.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return Garages.city.ilike(escaped, escape="\\")
+
+
+def daily_requests(db: Session, garage_id: int, start_date: datetime,
+                   end_date: datetime) -> list:
+    # One row per day: the date series is generated in Postgres and joined to
+    # the per-day rollup, so the cost is O(days) whatever the booking volume.
+    days = select(
+        cast(func.generate_series(start_date, end_date, timedelta(days=1)),
+             Date).label("day")
+    ).subquery()
+    return db.query(
+        days.c.day,
+        func.coalesce(GarageDailyBookings.requests, 0).label("request_count"),
+    ).select_from(days).outerjoin(
+        GarageDailyBookings,
+        and_(GarageDailyBookings.day == days.c.day,
+             GarageDailyBookings.garage_id == garage_id)
+    ).order_by(days.c.day).all()
 
 
 @garage_router.get("/garages/dailyAvailabilityReport")
@@ -39,47 +79,130 @@ def get_garages_report(
         raise HTTPException(status_code=404, detail="Garage not found.")
 
     daily_capacity = garage.capacity
-
-    maintenance_data = db.query(Maintenances).filter(
-        Maintenances.garage_id == garageId,
-        Maintenances.scheduled_date >= start_date_parsed,
-        Maintenances.scheduled_date <= end_date_parsed
-    ).all()
-
-    requests_by_date = {}
-    for maintenance in maintenance_data:
-        maintenance_date = maintenance.scheduled_date
-        requests_by_date[maintenance_date] = requests_by_date.get(maintenance_date,
-                                                                  0) + 1
+    requests_by_date = daily_requests(db, garageId, start_date_parsed, end_date_parsed)
 
     response = []
-    current_date = start_date_parsed
-    while current_date <= end_date_parsed:
-        request_count = requests_by_date.get(current_date.date(), 0)
-        available_capacity = daily_capacity - request_count
-
+    for row in requests_by_date:
         response.append({
-            "date": str(current_date.date()),
-            "requests": request_count,
-            "availableCapacity": max(available_capacity, 0)
+            "date": str(row.day),
+            "requests": row.request_count,
+            "availableCapacity": max(daily_capacity - row.request_count, 0)
         })
 
-        current_date += timedelta(days=1)
-
     return response
 
 
-@garage_router.get("/garages/{garage_id}", response_model=GaragesOut)
-def get_garage_by_id(garage_id, db: Session = Depends(get_db)):
-    return GarageValidators.validate_garage_id(garage_id, db)
+@garage_router.get("/garages/availabilityMatrix", response_model=AvailabilityMatrix)
+def get_availability_matrix(
+        city: str,
+        startDate: str,
+        endDate: str,
+        db: Session = Depends(get_db)
+):
+    try:
+        start_date = datetime.strptime(startDate, "%Y-%m-%d").date()
+        end_date = datetime.strptime(endDate, "%Y-%m-%d").date()
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400, detail="Invalid date format. Use YYYY-MM-DD."
+        ) from e
 
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=400, detail="Start date cannot be after end date."
+        )
+    day_count = (end_date - start_date).days + 1
+    if day_count > MAX_MATRIX_DAYS:
+        raise HTTPException(
+            status_code=400, detail=f"At most {MAX_MATRIX_DAYS} days can be requested."
+        )
 
-@garage_router.get("/garages", response_model=List[GaragesOut])
-def get_all_garages(city: str = None, db: Session = Depends(get_db)):
-    query = db.query(Garages)
+    # One query returns every garage in the city with its non-empty days from
+    # the per-day rollup; garages without bookings come back once with no day.
+    rows = db.execute(
+        select(Garages.garage_id, Garages.name, Garages.capacity,
+               GarageDailyBookings.day, GarageDailyBookings.requests)
+        .outerjoin(GarageDailyBookings,
+                   and_(GarageDailyBookings.garage_id == Garages.garage_id,
+                        GarageDailyBookings.day >= start_date,
+                        GarageDailyBookings.day <= end_date))
+        .where(city_is(city))
+        .order_by(Garages.garage_id)
+    ).all()
+
+    # numpy is only needed here, so workers that never serve the matrix
+    # don't pay for importing it at startup.
+    import numpy as np
+
+    garages = {}
+    for row in rows:
+        garages.setdefault(row.garage_id, (row.name, row.capacity))
+    garage_index = {garage_id: index for index, garage_id in enumerate(garages)}
+    booked = [row for row in rows if row.day is not None]
+
+    requests = np.zeros((len(garages), day_count), dtype=np.int32)
+    requests[
+        np.fromiter((garage_index[row.garage_id] for row in booked), dtype=np.intp,
+                    count=len(booked)),
+        np.fromiter(((row.day - start_date).days for row in booked), dtype=np.intp,
+                    count=len(booked)),
+    ] = np.fromiter((row.requests for row in booked), dtype=np.int32, count=len(booked))
+    capacities = np.fromiter((capacity for _, capacity in garages.values()),
+                             dtype=np.int32, count=len(garages))
+    available = np.maximum(capacities[:, np.newaxis] - requests, 0)
+
+    dates = np.arange(np.datetime64(start_date), np.datetime64(end_date) + 1)
+    return {
+        "dates": dates.astype(str).tolist(),
+        "garages": [
+            {
+                "id": garage_id,
+                "name": name,
+                "capacity": capacity,
+                "requests": garage_requests,
+                "availableCapacity": garage_available,
+            }
+            for (garage_id, (name, capacity)), garage_requests, garage_available
+            in zip(garages.items(), requests.tolist(), available.tolist())
+        ],
+    }
+
+
+@garage_router.get("/garages/{garage_id}", response_model=GaragesOut,
+                   dependencies=[Depends(read_from_primary)])
+def get_garage_by_id(garage_id: int, db: Session = Depends(get_db)):
+    return entity_cache.get_garage(garage_id, db)
+
+
+@garage_router.get("/garages", response_model=GaragesPage)
+def get_all_garages(
+        city: str = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
+        fields: Optional[str] = fields_query(GaragesOut),
+        db: Session = Depends(get_db)
+):
+    selected = parse_fields(fields, GaragesOut)
+    if selected is None:
+        query = db.query(Garages)
+    else:
+        # Only the requested columns, plus the sort key, are read.
+        query = db.query(Garages.garage_id, *(
+            getattr(Garages, name) for name in requested_attributes(GaragesOut, selected)
+            if name != "garage_id"
+        ))
     if city:
         query = query.filter(Garages.city.ilike(f"%{city}%"))
-    return query.all()
+    if cursor:
+        (last_garage_id,) = decode_cursor(cursor, int)
+        query = query.filter(Garages.garage_id > last_garage_id)
+
+    rows = query.order_by(Garages.garage_id).limit(limit + 1).all()
+    page = build_page(rows, limit, lambda garage: (garage.garage_id,))
+    if selected is None:
+        return fast_page(page, garage_item) if FAST_JSON else page
+    page["items"] = [row._asdict() for row in page["items"]]
+    return sparse_page(GaragesOut, selected, page)
 
 
 @garage_router.post("/garages", response_model=GaragesOut)
@@ -97,7 +220,7 @@ def create_garage(garage: GaragesIn, db: Session = Depends(get_db)):
 
 @garage_router.put("/garages/{garage_id}", response_model=GaragesOut)
 def update_garage(garage_id: int, garage: GaragesIn, db: Session = Depends(get_db)):
-    existing_garage: Garages | None = GarageValidators.validate_garage_id(garage_id, db)
+    existing_garage: Garages = EntityLoader.of(db).garage(garage_id)
 
     existing_garage.name = garage.name
     existing_garage.location = garage.location
@@ -105,12 +228,22 @@ def update_garage(garage_id: int, garage: GaragesIn, db: Session = Depends(get_d
     existing_garage.capacity = garage.capacity
 
     db.commit()
+    entity_cache.invalidate_garage(garage_id)
+    # Available capacity in the daily report depends on the garage's capacity.
+    report_cache.invalidate_garage(garage_id)
     db.refresh(existing_garage)
     return existing_garage
 
 
 @garage_router.delete("/garages/{garage_id}")
 def delete_garage(garage_id: int, db: Session = Depends(get_db)):
-    garage: Garages | None = GarageValidators.validate_garage_id(garage_id, db)
+    garage: Garages = EntityLoader.of(db).garage(garage_id)
+    # Cached cars list their garage ids, so the cars served here go stale too.
+    car_ids = [row.car_id for row in db.query(CarGarageAssociations.car_id)
+               .filter(CarGarageAssociations.garage_id == garage_id)]
     db.delete(garage)
+    db.commit()
+    entity_cache.invalidate_garage(garage_id)
+    entity_cache.invalidate_car(*car_ids)
+    report_cache.invalidate_garage(garage_id)
     return True
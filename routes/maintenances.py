@@ -1,21 +1,64 @@
+import csv
+import io
+import json
 from calendar import monthrange
+from collections import defaultdict
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, date
 
+from sqlalchemy import insert, select, Select, cast, and_, true, Date, delete, update
 from sqlalchemy.orm import Session
-from sqlalchemy.sql import extract, func
+from sqlalchemy.sql import extract, func, tuple_
 from fastapi.params import Depends
+from fastapi import Query
+from fastapi.responses import StreamingResponse
 from fastapi.exceptions import HTTPException
-from fastapi import APIRouter
+from routes.db_router import DbRouter
 
-from orm import Cars, Maintenances, Garages
-from models import MaintenancesIn, MaintenancesOut, MonthsEnum, \
-    MaintenanceRequestReport, MaintenanceYearMonth
+from orm import Cars, Maintenances, Garages, GarageDailyBookings
+from orm.booking_rollup import record_booking, reserve_booking, reserve_bookings, \
+    move_booking
+from models import MaintenancesIn, MaintenancesOut, MaintenancesPage, MonthsEnum, \
+    MaintenanceRequestReport, MaintenanceYearMonth, MaintenancesBulkOut, AvailableSlot
 from routes.buisness_validators import CarValidators, GarageValidators, \
-    MaintenanceValidators
-from orm.db_session import get_db
-
-maintenances_router = APIRouter()
+    MaintenanceValidators, EntityLoader
+from orm.db_session import DB_MODE, get_async_db_session, get_db, get_db_session
+from routes.report_cache import report_cache
+from routes.bulk import chunked, validate_bulk_size
+from routes.fast_json import FAST_JSON, fast_page, maintenance_item
+from routes.fieldsets import fields_query, parse_fields, sparse_page
+from routes.garages import city_is
+from routes.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, \
+    build_page
+
+maintenances_router = DbRouter()
+
+FULLY_BOOKED = "Garage is fully booked on this date."
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_COLUMNS = ["id", "carId", "carName", "serviceType", "scheduledDate",
+                  "garageId", "garageName"]
+
+# Columns selected for each output field of a maintenance row, and how the
+# field's value is read back from the row.
+MAINTENANCE_COLUMNS = {
+    "id": [Maintenances.maintenance_id],
+    "carId": [Maintenances.car_id.label("carId")],
+    "carName": [Cars.make.label("carMake"), Cars.model.label("carModel")],
+    "serviceType": [Maintenances.service_type],
+    "scheduledDate": [Maintenances.scheduled_date],
+    "garageId": [Maintenances.garage_id.label("garageId")],
+    "garageName": [Garages.name.label("garageName")],
+}
+MAINTENANCE_VALUES = {
+    "id": lambda row: row.maintenance_id,
+    "carId": lambda row: row.carId,
+    "carName": lambda row: f"{row.carMake} {row.carModel}",
+    "serviceType": lambda row: row.service_type,
+    "scheduledDate": lambda row: row.scheduled_date,
+    "garageId": lambda row: row.garageId,
+    "garageName": lambda row: row.garageName,
+}
 
 
 @maintenances_router.get("/maintenance/monthlyRequestsReport",
@@ -41,20 +84,25 @@ def get_monthly_requests_report(garageId: int, startMonth: str, endMonth: str,
         days_in_month = monthrange(current_date.year, current_date.month)[1]
         current_date += timedelta(days=days_in_month)
 
+    last_day = end_date.replace(day=monthrange(end_date.year, end_date.month)[1])
+
+    # Summed from the per-day rollup, so the cost depends on the number of
+    # days in range rather than the number of maintenances.
     query = db.query(
-        extract("year", Maintenances.scheduled_date).label("year"),
-        extract("month", Maintenances.scheduled_date).label("month"),
-        func.count(Maintenances.maintenance_id).label("request_count"),
+        extract("year", GarageDailyBookings.day).label("year"),
+        extract("month", GarageDailyBookings.day).label("month"),
+        func.sum(GarageDailyBookings.requests).label("request_count"),
     ).filter(
-        Maintenances.scheduled_date >= start_date,
-        Maintenances.scheduled_date <= end_date
+        GarageDailyBookings.day >= start_date,
+        GarageDailyBookings.day <= last_day
     )
 
-    query = query.filter(Maintenances.garage_id == garageId)
+    query = query.filter(GarageDailyBookings.garage_id == garageId)
 
     query = query.group_by("year", "month").all()
 
-    monthly_data = {(int(row.year), int(row.month)): row.request_count for row in query}
+    monthly_data = {(int(row.year), int(row.month)): int(row.request_count)
+                    for row in query}
 
     response = []
     for year, month in month_range:
@@ -72,14 +120,155 @@ def get_monthly_requests_report(garageId: int, startMonth: str, endMonth: str,
     return response
 
 
+@maintenances_router.get("/maintenance/nextAvailable",
+                         response_model=List[AvailableSlot])
+def get_next_available_slots(
+        city: str,
+        from_date: Optional[str] = Query(None, alias="from"),
+        days: int = Query(30, ge=1, le=366),
+        limit: int = Query(10, ge=1, le=100),
+        db: Session = Depends(get_db)
+):
+    try:
+        start_date = datetime.strptime(from_date, "%Y-%m-%d") if from_date \
+            else datetime.combine(date.today(), datetime.min.time())
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400, detail="Invalid date format. Use YYYY-MM-DD."
+        ) from e
+
+    # Every garage in the city is crossed with the day series and checked
+    # against the booking rollup in one statement; the earliest free
+    # (day, garage) pairs come back first.
+    day_series = select(
+        cast(func.generate_series(start_date, start_date + timedelta(days=days - 1),
+                                  timedelta(days=1)), Date).label("day")
+    ).subquery()
+    booked = func.coalesce(GarageDailyBookings.requests, 0)
+    rows = db.execute(
+        select(day_series.c.day, Garages.garage_id, Garages.name,
+               (Garages.capacity - booked).label("available_capacity"))
+        .select_from(Garages)
+        .join(day_series, true())
+        .outerjoin(GarageDailyBookings,
+                   and_(GarageDailyBookings.garage_id == Garages.garage_id,
+                        GarageDailyBookings.day == day_series.c.day))
+        .where(city_is(city), booked < Garages.capacity)
+        .order_by(day_series.c.day, Garages.garage_id)
+        .limit(limit)
+    ).all()
+
+    return [
+        {
+            "date": str(row.day),
+            "garageId": row.garage_id,
+            "garageName": row.name,
+            "availableCapacity": row.available_capacity,
+        }
+        for row in rows
+    ]
+
+
+@maintenances_router.get("/maintenance/export")
+def export_maintenances(
+        export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+        carId: Optional[int] = None,
+        garageId: Optional[int] = None,
+        startDate: Optional[str] = None,
+        endDate: Optional[str] = None,
+):
+    # The order of ix_maintenances_scheduled_date_maintenance_id: rows stream
+    # off the index, so the first batch goes out without sorting the rest.
+    query = _filtered_maintenances(carId, garageId, startDate, endDate).order_by(
+        Maintenances.scheduled_date, Maintenances.maintenance_id
+    )
+    # In async mode the rows are streamed through asyncpg on the event loop;
+    # the sync generators are iterated in the threadpool by StreamingResponse.
+    if DB_MODE == "async":
+        chunks = _export_chunks_async(_export_batches_async(query), export_format)
+    else:
+        chunks = _export_chunks(_export_batches(query), export_format)
+    if export_format == "csv":
+        return StreamingResponse(
+            chunks, media_type="text/csv",
+            headers={"Content-Disposition": "attachment; filename=maintenances.csv"}
+        )
+    return StreamingResponse(chunks, media_type="application/x-ndjson")
+
+
+def _export_rows(rows) -> list[dict]:
+    return [
+        {
+            "id": row.maintenance_id,
+            "carId": row.carId,
+            "carName": f"{row.carMake} {row.carModel}",
+            "serviceType": row.service_type,
+            "scheduledDate": row.scheduled_date.isoformat(),
+            "garageId": row.garageId,
+            "garageName": row.garageName,
+        }
+        for row in rows
+    ]
+
+
+def _export_batches(query: Select):
+    """
+    Streams the rows of query from a server-side cursor, EXPORT_BATCH_SIZE at
+    a time. The session lives in the generator because the response is still
+    being sent after the request dependencies have been closed. Exports read
+    from a replica when one is configured and usable.
+    """
+    with get_db_session(read_only=True) as session:
+        result = session.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for rows in result.partitions():
+            yield _export_rows(rows)
+
+
+async def _export_batches_async(query: Select):
+    """
+    _export_batches() on an AsyncSession, for DB_MODE=async.
+    """
+    async with get_async_db_session(read_only=True) as session:
+        result = await session.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for rows in result.partitions():
+            yield _export_rows(rows)
+
+
+def _ndjson_chunk(batch: list[dict]) -> str:
+    return "".join(json.dumps(row) + "\n" for row in batch)
+
+
+def _csv_chunk(batch: list[dict], header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    if header:
+        writer.writeheader()
+    writer.writerows(batch)
+    return buffer.getvalue()
+
+
+def _export_chunks(batches, export_format: str):
+    if export_format == "csv":
+        yield _csv_chunk([], header=True)
+    for batch in batches:
+        yield _ndjson_chunk(batch) if export_format == "ndjson" else _csv_chunk(batch)
+
+
+async def _export_chunks_async(batches, export_format: str):
+    if export_format == "csv":
+        yield _csv_chunk([], header=True)
+    async for batch in batches:
+        yield _ndjson_chunk(batch) if export_format == "ndjson" else _csv_chunk(batch)
+
+
 @maintenances_router.get("/maintenance/{maintenance_id}",
                          response_model=MaintenancesOut)
-def get_maintenance_by_id(maintenance_id, db: Session = Depends(get_db)):
-    maintenance = MaintenanceValidators.validate_maintenance_id(maintenance_id, db)
-    car: Cars | None = CarValidators.validate_car_id(maintenance.car_id, db)
-    garage: Garages | None = GarageValidators.validate_garage_id(
-        maintenance.garage_id, db
-    )
+def get_maintenance_by_id(maintenance_id: int, db: Session = Depends(get_db)):
+    # The maintenance, its car and its garage are read in a single joined query.
+    loader = EntityLoader.of(db)
+    maintenance = loader.maintenance(maintenance_id, with_references=True)
+    car: Cars = loader.car(maintenance.car_id)
+    garage: Garages = loader.garage(maintenance.garage_id)
 
     car_name: str = f"{car.make} {car.model}"
     garage_name: str = str(garage.name)
@@ -95,41 +284,81 @@ def get_maintenance_by_id(maintenance_id, db: Session = Depends(get_db)):
     }
 
 
-@maintenances_router.get("/maintenance", response_model=List[MaintenancesOut])
+def _filtered_maintenances(carId: Optional[int], garageId: Optional[int],
+                           startDate: Optional[str], endDate: Optional[str],
+                           fields: set[str] | None = None) -> Select:
+    """
+    Maintenance rows joined with their car and garage names, shared by the
+    list and export endpoints. With fields only those output fields and the
+    sort key are selected, and the car and garage joins are skipped unless
+    their names are requested.
+    """
+    wanted = MAINTENANCE_COLUMNS.keys() if fields is None \
+        else fields | {"id", "scheduledDate"}
+    query = select(*(column for field, columns in MAINTENANCE_COLUMNS.items()
+                     if field in wanted for column in columns)
+                   ).select_from(Maintenances)
+    if "carName" in wanted:
+        query = query.join(Cars, Maintenances.car_id == Cars.car_id)
+    if "garageName" in wanted:
+        query = query.join(Garages, Maintenances.garage_id == Garages.garage_id)
+
+    if carId:
+        query = query.where(Maintenances.car_id == carId)
+    if garageId:
+        query = query.where(Maintenances.garage_id == garageId)
+    # Bound as dates: asyncpg, unlike psycopg2, won't compare a date to text.
+    try:
+        if startDate:
+            query = query.where(Maintenances.scheduled_date >=
+                                datetime.strptime(startDate, "%Y-%m-%d").date())
+        if endDate:
+            query = query.where(Maintenances.scheduled_date <=
+                                datetime.strptime(endDate, "%Y-%m-%d").date())
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400, detail="Invalid date format. Use YYYY-MM-DD."
+        ) from e
+
+    # Ensure we only get records where both car_id and garage_id exist
+    query = query.where(Maintenances.car_id.isnot(None),
+                        Maintenances.garage_id.isnot(None))
+    return query
+
+
+@maintenances_router.get("/maintenance", response_model=MaintenancesPage)
 def get_all_maintenances(
         carId: Optional[int] = None,
         garageId: Optional[int] = None,
         startDate: Optional[str] = None,
         endDate: Optional[str] = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
+        fields: Optional[str] = fields_query(MaintenancesOut),
         db: Session = Depends(get_db)
 ):
-    query = db.query(
-        Maintenances.maintenance_id,
-        Maintenances.scheduled_date,
-        Maintenances.service_type,
-        Maintenances.car_id.label("carId"),
-        Cars.make.label("carMake"),
-        Cars.model.label("carModel"),
-        Maintenances.garage_id.label("garageId"),
-        Garages.name.label("garageName"),
-    ).join(Cars, Maintenances.car_id == Cars.car_id
-           ).join(Garages, Maintenances.garage_id == Garages.garage_id)
-
-    if carId:
-        query = query.filter(Maintenances.car_id == carId)
-    if garageId:
-        query = query.filter(Maintenances.garage_id == garageId)
-    if startDate:
-        query = query.filter(Maintenances.scheduled_date >= startDate)
-    if endDate:
-        query = query.filter(Maintenances.scheduled_date <= endDate)
-
-    # Ensure we only get records where both car_id and garage_id exist
-    query = query.filter(Maintenances.car_id.isnot(None),
-                         Maintenances.garage_id.isnot(None))
-    results = query.all()
-
-    return [
+    selected = parse_fields(fields, MaintenancesOut)
+    query = _filtered_maintenances(carId, garageId, startDate, endDate, selected)
+    if cursor:
+        last_date, last_id = decode_cursor(cursor, date.fromisoformat, int)
+        query = query.where(
+            tuple_(Maintenances.scheduled_date, Maintenances.maintenance_id)
+            > tuple_(last_date, last_id)
+        )
+
+    results = db.execute(query.order_by(Maintenances.scheduled_date,
+                                        Maintenances.maintenance_id)
+                         .limit(limit + 1)).all()
+    page = build_page(results, limit,
+                      lambda row: (row.scheduled_date.isoformat(), row.maintenance_id))
+    if selected is not None:
+        page["items"] = [{field: MAINTENANCE_VALUES[field](row) for field in selected}
+                         for row in page["items"]]
+        return sparse_page(MaintenancesOut, selected, page)
+    if FAST_JSON:
+        return fast_page(page, maintenance_item)
+
+    page["items"] = [
         {
             "maintenance_id": row.maintenance_id,
             "scheduled_date": row.scheduled_date,
@@ -139,28 +368,39 @@ def get_all_maintenances(
             "garageId": row.garageId,
             "garageName": row.garageName,
         }
-        for row in results
+        for row in page["items"]
     ]
+    return page
 
 
 @maintenances_router.post("/maintenance", response_model=MaintenancesOut)
 def create_maintenances(maintenance: MaintenancesIn, db: Session = Depends(get_db)):
-    car: Cars | None = CarValidators.validate_car_id(maintenance.carId, db)
-    garage: Garages | None = GarageValidators.validate_garage_id(
-        maintenance.garageId, db
+    # The car and the garage are checked against the database, not the entity
+    # cache: another worker may have deleted one without this one hearing of it.
+    loader = EntityLoader.of(db).prime(car_ids=[maintenance.carId],
+                                       garage_ids=[maintenance.garageId])
+    car = loader.car(maintenance.carId)
+    garage = loader.garage(maintenance.garageId)
+
+    scheduled_date = MaintenanceValidators.validate_scheduled_date(
+        maintenance.scheduledDate
     )
 
+    if not reserve_booking(db, maintenance.garageId, scheduled_date):
+        raise HTTPException(status_code=409, detail=FULLY_BOOKED)
+
     car_name: str = f"{car.make} {car.model}"
     garage_name: str = str(garage.name)
     new_maintenance = Maintenances(
         service_type=maintenance.serviceType,
-        scheduled_date=maintenance.scheduledDate,
+        scheduled_date=scheduled_date,
         car_id=maintenance.carId,
         garage_id=maintenance.garageId
     )
     db.add(new_maintenance)
     db.flush()
     db.commit()
+    report_cache.invalidate_garage(maintenance.garageId)
 
     return {
         "id": new_maintenance.maintenance_id,
@@ -173,36 +413,148 @@ def create_maintenances(maintenance: MaintenancesIn, db: Session = Depends(get_d
     }
 
 
+@maintenances_router.post("/maintenance/bulk", response_model=MaintenancesBulkOut)
+def create_maintenances_bulk(maintenances: List[MaintenancesIn],
+                             db: Session = Depends(get_db)):
+    validate_bulk_size(maintenances)
+    # Referenced cars and garages are checked up front with set-based queries.
+    car_names = {
+        car_id: f"{car.make} {car.model}" for car_id, car in
+        CarValidators.cars_by_id([item.carId for item in maintenances], db).items()
+    }
+    garage_names = {
+        garage_id: str(garage.name) for garage_id, garage in
+        GarageValidators.garages_by_id([item.garageId for item in maintenances],
+                                       db).items()
+    }
+
+    errors = []
+    accepted = []
+    for index, item in enumerate(maintenances):
+        if item.carId not in car_names:
+            errors.append({"index": index, "detail": "Car not found."})
+        elif item.garageId not in garage_names:
+            errors.append({"index": index, "detail": "Garage not found."})
+        else:
+            try:
+                scheduled_date = MaintenanceValidators.validate_scheduled_date(
+                    item.scheduledDate
+                )
+            except HTTPException as e:
+                errors.append({"index": index, "detail": e.detail})
+                continue
+            accepted.append((index, item, scheduled_date))
+
+    # Capacity is reserved for every (garage, day) of a batch at once; when a
+    # day doesn't fit as a whole, its free places go to the items in payload
+    # order. Batches follow (garage, day) order, like the rows inside them.
+    slots = defaultdict(list)
+    for entry in accepted:
+        _, item, scheduled_date = entry
+        slots[(item.garageId, scheduled_date)].append(entry)
+    reserved = {}
+    for batch in chunked(sorted(slots)):
+        reserved.update(reserve_bookings(db, {slot: len(slots[slot]) for slot in batch}))
+    booked = []
+    for slot, entries in slots.items():
+        booked.extend(entries[:reserved[slot]])
+        errors.extend({"index": index, "detail": FULLY_BOOKED}
+                      for index, _, _ in entries[reserved[slot]:])
+    booked.sort(key=lambda entry: entry[0])
+    errors.sort(key=lambda error: error["index"])
+
+    created = []
+    for batch in chunked(booked):
+        maintenance_ids = db.scalars(
+            insert(Maintenances).returning(Maintenances.maintenance_id,
+                                           sort_by_parameter_order=True),
+            [{
+                "service_type": item.serviceType,
+                "scheduled_date": scheduled_date,
+                "car_id": item.carId,
+                "garage_id": item.garageId,
+            } for _, item, scheduled_date in batch]
+        ).all()
+        created.extend({
+            "id": maintenance_id,
+            "carId": item.carId,
+            "carName": car_names[item.carId],
+            "serviceType": item.serviceType,
+            "scheduledDate": scheduled_date,
+            "garageId": item.garageId,
+            "garageName": garage_names[item.garageId],
+        } for maintenance_id, (_, item, scheduled_date) in zip(maintenance_ids, batch))
+
+    db.commit()
+    report_cache.invalidate_garage(*{item.garageId for _, item, _ in booked})
+
+    return {"created": created, "errors": errors}
+
+
 @maintenances_router.put("/maintenance/{maintenance_id}",
                          response_model=MaintenancesOut)
-def get_maintenance_by_id(maintenance: MaintenancesIn, maintenance_id,
+def get_maintenance_by_id(maintenance: MaintenancesIn, maintenance_id: int,
                           db: Session = Depends(get_db)):
-    existing = MaintenanceValidators.validate_maintenance_id(maintenance_id, db)
-
-    car = CarValidators.validate_car_id(maintenance.carId, db)
-    garage = GarageValidators.validate_garage_id(maintenance.garageId, db)
+    loader = EntityLoader.of(db).prime(car_ids=[maintenance.carId],
+                                       garage_ids=[maintenance.garageId])
+    # Locked so that a concurrent move or delete can't release the old day twice.
+    existing = loader.maintenance(maintenance_id, for_update=True)
+
+    car = loader.car(maintenance.carId)
+    garage = loader.garage(maintenance.garageId)
+    scheduled_date = MaintenanceValidators.validate_scheduled_date(
+        maintenance.scheduledDate
+    )
 
-    existing.car_id = maintenance.carId
-    existing.garage_id = maintenance.garageId
-    existing.scheduled_date = maintenance.scheduledDate
-    existing.service_type = maintenance.serviceType
+    if not move_booking(db, existing.garage_id, existing.scheduled_date,
+                        maintenance.garageId, scheduled_date):
+        raise HTTPException(status_code=409, detail=FULLY_BOOKED)
+    car_name: str = f"{car.make} {car.model}"
+    garage_name: str = str(garage.name)
+    previous_garage_id = existing.garage_id
+    # Only moves the row from the day released above; on databases without
+    # row locks a concurrent move may have got there first.
+    moved = db.execute(update(Maintenances).where(
+        Maintenances.maintenance_id == maintenance_id,
+        Maintenances.garage_id == existing.garage_id,
+        Maintenances.scheduled_date == existing.scheduled_date,
+    ).values(
+        car_id=maintenance.carId,
+        garage_id=maintenance.garageId,
+        scheduled_date=scheduled_date,
+        service_type=maintenance.serviceType,
+    ).execution_options(synchronize_session=False))
+    if moved.rowcount == 0:
+        raise HTTPException(status_code=409,
+                            detail="Maintenance was changed by another request, retry.")
 
     db.commit()
+    report_cache.invalidate_garage(previous_garage_id, maintenance.garageId)
     db.refresh(existing)
 
     return {
         "id": existing.maintenance_id,
         "carId": existing.car_id,
-        "carName": f"{car.make} {car.model}",
+        "carName": car_name,
         "serviceType": existing.service_type,
         "scheduledDate": existing.scheduled_date,
         "garageId": existing.garage_id,
-        "garageName": garage.name,
+        "garageName": garage_name,
     }
 
 
 @maintenances_router.delete("/maintenance/{maintenance_id}", response_model=bool)
-def get_maintenance_by_id(maintenance_id, db: Session = Depends(get_db)):
-    existing = MaintenanceValidators.validate_maintenance_id(maintenance_id, db)
-    db.delete(existing)
+def get_maintenance_by_id(maintenance_id: int, db: Session = Depends(get_db)):
+    existing = EntityLoader.of(db).maintenance(maintenance_id, for_update=True)
+    garage_id = existing.garage_id
+    # The counter follows the rows actually deleted: a concurrent delete that
+    # got there first leaves nothing to release.
+    deleted = db.execute(delete(Maintenances).where(
+        Maintenances.maintenance_id == maintenance_id
+    ).execution_options(synchronize_session=False))
+    if deleted.rowcount == 0:
+        raise HTTPException(status_code=404, detail="Maintenance not found.")
+    record_booking(db, garage_id, existing.scheduled_date, -1)
+    db.commit()
+    report_cache.invalidate_garage(garage_id)
     return True
@@ -0,0 +1,40 @@
+import base64
+import json
+from typing import Callable, Sequence
+
+from fastapi.exceptions import HTTPException
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(*values) -> str:
+    """
+    Encodes the sort key of the last row of a page into an opaque cursor.
+    """
+    raw = json.dumps(values, default=str, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *parsers: Callable[[object], object]) -> list:
+    """
+    Decodes a cursor produced by encode_cursor, converting each sort key value
+    with the matching parser.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise ValueError("Unexpected cursor shape")
+        return [parse(value) for parse, value in zip(parsers, values)]
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor.") from e
+
+
+def build_page(rows: Sequence, limit: int, key: Callable[[object], tuple]) -> dict:
+    """
+    Trims a result fetched with ``limit + 1`` rows into a page with its cursor.
+    """
+    items = list(rows[:limit])
+    next_cursor = encode_cursor(*key(items[-1])) if len(rows) > limit else None
+    return {"items": items, "nextCursor": next_cursor}
@@ -0,0 +1,193 @@
+import asyncio
+import base64
+import os
+import threading
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from cache import build_backend
+from orm.db_session import read_from_primary
+from routes.admission import AdmissionRoute
+
+# Report paths served through the cache, with the query parameter naming the
+# garage whose bookings they summarize.
+CACHED_REPORTS = {
+    "/garages/dailyAvailabilityReport": "garageId",
+    "/maintenance/monthlyRequestsReport": "garageId",
+}
+REPORT_CACHE_TTL_SECONDS = float(os.getenv("REPORT_CACHE_TTL_SECONDS", "5"))
+REPORT_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "1000"))
+REPORT_CACHE_BACKEND = os.getenv("REPORT_CACHE_BACKEND", "memory").lower()
+
+
+class CachedResponse:
+    __slots__ = ("status", "headers", "body")
+
+    def __init__(self, status: int, headers: list, body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def to_entry(self) -> dict:
+        """
+        The response as a JSON-compatible cache entry.
+        """
+        return {
+            "status": self.status,
+            "headers": [[name.decode("latin-1"), value.decode("latin-1")]
+                        for name, value in self.headers],
+            "body": base64.b64encode(self.body).decode("ascii"),
+        }
+
+    @classmethod
+    def from_entry(cls, entry: dict) -> "CachedResponse":
+        return cls(entry["status"],
+                   [(name.encode("latin-1"), value.encode("latin-1"))
+                    for name, value in entry["headers"]],
+                   base64.b64decode(entry["body"]))
+
+    async def __call__(self, send):
+        await send({"type": "http.response.start", "status": self.status,
+                    "headers": self.headers})
+        await send({"type": "http.response.body", "body": self.body})
+
+
+class ReportCache:
+    """
+    Short-TTL cache of rendered report responses, with single-flight
+    coalescing of identical requests that arrive while one is computing.
+
+    Keys carry a per-garage generation, so invalidate_garage() makes every
+    cached report of that garage unreachable at once. Generations are process
+    local: other workers serve their entries until the TTL runs out.
+
+    Only successful responses are cached or handed to coalesced requests; a
+    request whose shared computation failed or was shed is served on its own.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int, backend: str = "memory"):
+        self.enabled = ttl_seconds > 0
+        self.backend = build_backend(backend, max_entries, ttl_seconds)
+        self._generations: dict[int, int] = {}
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+
+    def key(self, path: str, garage_param: str, query_string: bytes) -> str | None:
+        """
+        Cache key for the normalized parameters, or None when the request
+        names no valid garage and should simply be served.
+        """
+        params = sorted((name, value.strip()) for name, value in
+                        parse_qsl(query_string.decode("latin-1")))
+        try:
+            garage_id = int(dict(params)[garage_param])
+        except (KeyError, ValueError):
+            return None
+        with self._lock:
+            generation = self._generations.get(garage_id, 0)
+        return f"{path}:{garage_id}:{generation}?{urlencode(params)}"
+
+    def invalidate_garage(self, *garage_ids: int):
+        with self._lock:
+            for garage_id in garage_ids:
+                self._generations[garage_id] = self._generations.get(garage_id, 0) + 1
+            self.invalidations += len(garage_ids)
+
+    async def _backend(self, method, *args):
+        # serve() runs on the event loop, which a network round trip would stall.
+        if self.backend.blocking:
+            return await run_in_threadpool(method, *args)
+        return method(*args)
+
+    def _count(self, **counts: int):
+        with self._lock:
+            for name, count in counts.items():
+                setattr(self, name, getattr(self, name) + count)
+
+    async def serve(self, key: str, compute) -> CachedResponse | None:
+        """
+        The cached response for key; otherwise awaits an identical request in
+        flight, or runs compute() and caches its successful result. None means
+        the shared computation did not succeed and the caller should serve on
+        its own.
+        """
+        if (cached := await self._backend(self.backend.get, key)) is not None:
+            self._count(hits=1)
+            return CachedResponse.from_entry(cached)
+        if (in_flight := self._in_flight.get(key)) is not None:
+            self._count(coalesced=1)
+            return await asyncio.shield(in_flight)
+
+        self._count(misses=1)
+        future = self._in_flight[key] = asyncio.get_running_loop().create_future()
+        shared = None
+        try:
+            response = await compute()
+            if 200 <= response.status < 300:
+                await self._backend(self.backend.set, key, response.to_entry())
+                shared = response
+            return response
+        finally:
+            del self._in_flight[key]
+            future.set_result(shared)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            stats = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hitRatio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+        if hasattr(self.backend, "evictions"):
+            stats["entries"] = len(self.backend)
+        return stats
+
+
+report_cache = ReportCache(REPORT_CACHE_TTL_SECONDS, REPORT_CACHE_MAX_ENTRIES,
+                           REPORT_CACHE_BACKEND)
+
+
+class ReportCachingRoute(AdmissionRoute):
+    """
+    AdmissionRoute that serves the CACHED_REPORTS paths through report_cache.
+    Hits and coalesced requests are answered without taking an admission slot;
+    misses are computed on the primary.
+    """
+
+    async def handle(self, scope, receive, send):
+        garage_param = CACHED_REPORTS.get(self.path)
+        key = report_cache.key(self.path, garage_param, scope["query_string"]) \
+            if garage_param and report_cache.enabled else None
+        if key is None:
+            await super().handle(scope, receive, send)
+            return
+
+        async def compute() -> CachedResponse:
+            messages = []
+
+            async def capture(message):
+                messages.append(message)
+
+            # What gets cached is read from the primary, like the entity cache.
+            read_from_primary(Request(scope))
+            await super(ReportCachingRoute, self).handle(scope, receive, capture)
+            start = messages[0]
+            return CachedResponse(
+                start["status"], start.get("headers", []),
+                b"".join(message.get("body", b"") for message in messages[1:]),
+            )
+
+        response = await report_cache.serve(key, compute)
+        if response is None:
+            await super().handle(scope, receive, send)
+            return
+        await response(send)
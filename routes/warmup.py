@@ -0,0 +1,55 @@
+import logging
+from datetime import datetime
+
+from fastapi.exceptions import HTTPException
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from routes.buisness_validators import EntityLoader
+from routes.cars import get_all_cars
+from routes.garages import daily_requests, get_all_garages, get_garages_report
+from routes.maintenances import get_all_maintenances, get_monthly_requests_report
+
+logger = logging.getLogger(__name__)
+
+# Ids that match no row: the statements run, compile and return nothing.
+NO_ID = -1
+
+
+def precompile_statements(session: Session):
+    """
+    Runs the hot read paths once against ids that match nothing, so their
+    statements are compiled into the engine's statement cache before the
+    first request. Limits and filter values are bound parameters, so later
+    requests with other values reuse the cached compilation.
+
+    Handlers that stop with a 404 before their main query, such as the daily
+    report, have that query run directly as well.
+    """
+    warmups = [
+        lambda: EntityLoader(session).prime(car_ids=[NO_ID],
+                                            license_plates=[""]).car(NO_ID),
+        lambda: EntityLoader(session).garage(NO_ID),
+        lambda: EntityLoader(session).maintenance(NO_ID, with_references=True),
+        lambda: get_all_cars(carMake=None, garageId=None, fromYear=None, toYear=None,
+                             limit=1, cursor=None, fields=None, db=session),
+        lambda: get_all_garages(city=None, limit=1, cursor=None, fields=None,
+                                db=session),
+        lambda: get_all_maintenances(carId=None, garageId=NO_ID, startDate=None,
+                                     endDate=None, limit=1, cursor=None, fields=None,
+                                     db=session),
+        lambda: get_monthly_requests_report(garageId=NO_ID, startMonth="2000-01",
+                                            endMonth="2000-01", db=session),
+        lambda: get_garages_report(garageId=NO_ID, startDate="2000-01-01",
+                                   endDate="2000-01-01", db=session),
+        lambda: daily_requests(session, NO_ID, datetime(2000, 1, 1), datetime(2000, 1, 1)),
+    ]
+    for warmup in warmups:
+        try:
+            warmup()
+        except HTTPException:
+            pass
+        except SQLAlchemyError as e:
+            # e.g. Postgres-only SQL on a SQLite database
+            logger.debug("Skipping statement warm-up: %s", e)
+            session.rollback()
@@ -0,0 +1,133 @@
+"""
+Production entry point: serves main.create_app() from a pre-forked pool of workers.
+
+    python -m server --workers 4 --port 8000
+
+gunicorn's master forks the uvicorn workers, restarts any that die, and on
+SIGHUP replaces them gracefully (new workers start before old ones finish
+their in-flight requests). Every option falls back to an environment
+variable, see add_arguments().
+
+With DB_CONNECTION_BUDGET set, that many database connections are shared
+evenly by the workers: each worker's pool gets budget // workers
+connections and no overflow, so the whole server never holds more.
+"""
+import argparse
+import logging
+import os
+import shutil
+
+WORKER_CLASS = "uvicorn.workers.UvicornWorker"
+
+logger = logging.getLogger(__name__)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--host", default=os.getenv("SERVER_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVER_PORT", "8000")))
+    parser.add_argument("--workers", type=int,
+                        default=int(os.getenv("SERVER_WORKERS", str(os.cpu_count() or 1))))
+    parser.add_argument("--keepalive", type=int,
+                        default=int(os.getenv("SERVER_KEEPALIVE", "5")),
+                        help="seconds to keep idle client connections open")
+    parser.add_argument("--backlog", type=int,
+                        default=int(os.getenv("SERVER_BACKLOG", "2048")),
+                        help="pending connections the listen socket queues")
+    parser.add_argument("--graceful-timeout", type=int,
+                        default=int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30")),
+                        help="seconds workers get to finish requests on restart")
+    parser.add_argument("--db-connection-budget", type=int,
+                        default=int(os.getenv("DB_CONNECTION_BUDGET", "0")),
+                        help="database connections shared by all workers, 0 to keep "
+                             "DB_POOL_SIZE and DB_MAX_OVERFLOW per worker")
+
+
+def pool_size_per_worker(budget: int, workers: int) -> int:
+    if budget < workers:
+        raise ValueError(f"A budget of {budget} connections can't give each of "
+                         f"{workers} workers one.")
+    return budget // workers
+
+
+def warn_about_process_local_caches(workers: int):
+    if workers > 1 and os.getenv("ENTITY_CACHE_BACKEND", "memory").lower() == "memory":
+        logger.warning("ENTITY_CACHE_BACKEND=memory keeps a cache per worker: a car or "
+                       "garage changed through one of the %d workers is served stale by "
+                       "the others for up to ENTITY_CACHE_TTL_SECONDS. Set "
+                       "ENTITY_CACHE_BACKEND=redis to share it.", workers)
+
+
+def prepare_metrics_directory(workers: int) -> str | None:
+    """
+    Empties PROMETHEUS_MULTIPROC_DIR for a run with several workers and
+    returns it; None when every sample stays in the one worker's registry.
+    """
+    multiproc_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir and workers == 1:
+        # Nothing to merge. prometheus_client guards all multiprocess values of
+        # a process with one lock; without the directory each value has its own.
+        del os.environ["PROMETHEUS_MULTIPROC_DIR"]
+        return None
+    if multiproc_dir:
+        # Samples left by a previous run would be merged into /metrics.
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir)
+    return multiproc_dir
+
+
+def _child_exit(server, worker):
+    # Drop the exited worker's live gauges from the shared metrics directory.
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def run(args: argparse.Namespace):
+    from gunicorn.app.base import BaseApplication
+
+    if args.db_connection_budget:
+        # Read by Settings.from_env() when the app is loaded; each forked worker
+        # then builds its own engine with this pool in its lifespan.
+        os.environ["DB_POOL_SIZE"] = str(pool_size_per_worker(args.db_connection_budget,
+                                                              args.workers))
+        os.environ["DB_MAX_OVERFLOW"] = "0"
+        os.environ.setdefault("DB_WARM_CONNECTIONS", os.environ["DB_POOL_SIZE"])
+
+    warn_about_process_local_caches(args.workers)
+
+    multiproc_dir = prepare_metrics_directory(args.workers)
+
+    options = {
+        "bind": f"{args.host}:{args.port}",
+        "workers": args.workers,
+        "worker_class": WORKER_CLASS,
+        "keepalive": args.keepalive,
+        "backlog": args.backlog,
+        "graceful_timeout": args.graceful_timeout,
+        # The app is imported once in the master and forked; engines and
+        # connections are only created by each worker's lifespan.
+        "preload_app": True,
+    }
+    if multiproc_dir:
+        options["child_exit"] = _child_exit
+
+    class Server(BaseApplication):
+        def load_config(self):
+            for name, value in options.items():
+                self.cfg.set(name, value)
+
+        def load(self):
+            from main import create_app
+            return create_app()
+
+    Server().run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import os
+from dataclasses import dataclass, field
+
+from dotenv import load_dotenv
+
+
+def _flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+@dataclass
+class Settings:
+    """
+    Database and startup configuration of one API process.
+
+    from_env() reads the environment (after loading .env); tests and scripts
+    may build Settings directly to point an app at another database.
+    """
+    database_url: str
+    # "sync" (psycopg2 session per threadpool worker) or "async" (asyncpg
+    # session on the event loop).
+    db_mode: str = "sync"
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30
+    pool_recycle: int = -1
+    pool_pre_ping: bool = False
+    statement_timeout_ms: int = 0
+    pool_wait_warn_ms: float = 100
+    # Optional read replicas; see orm.replicas.
+    replica_urls: list[str] = field(default_factory=list)
+    replica_max_lag_seconds: float = 5
+    replica_check_interval_seconds: float = 2
+    replica_connect_timeout: int = 2
+    read_your_writes_seconds: float = 5
+    # Connections opened by the lifespan before the app takes traffic, and
+    # whether the hot statements are compiled up front.
+    warm_connections: int = 0
+    precompile_statements: bool = True
+    # Whether every worker's lifespan creates the upcoming maintenances
+    # partitions. That is DDL taking locks, so it normally runs as a scheduled
+    # job or deploy step instead: python -m orm.partitions create.
+    create_partitions_on_startup: bool = False
+    sql_repeat_threshold: int = 10
+    response_compression: str = "off"
+    response_compression_min_bytes: int = 1024
+
+    @property
+    def async_database_url(self) -> str:
+        return async_url(self.database_url)
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        load_dotenv()
+        # DATABASE_URL may be given in full, e.g. to point benchmarks at a SQLite file.
+        database_url = os.getenv("DATABASE_URL") or (
+            f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}"
+            f"@{os.getenv('DB_HOST', 'localhost')}:{int(os.getenv('DB_PORT', '5432'))}"
+            f"/{os.getenv('DB_NAME', 'car-management')}"
+        )
+        pool_size = int(os.getenv("DB_POOL_SIZE", "5"))
+        max_lag = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "5"))
+        return cls(
+            database_url=database_url,
+            db_mode=os.getenv("DB_MODE", "sync").lower(),
+            pool_size=pool_size,
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+            pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+            pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "-1")),
+            pool_pre_ping=_flag("DB_POOL_PRE_PING", "false"),
+            statement_timeout_ms=int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0")),
+            pool_wait_warn_ms=float(os.getenv("DB_POOL_WAIT_WARN_MS", "100")),
+            replica_urls=[url.strip() for url in
+                          os.getenv("DB_REPLICA_URLS", "").split(",") if url.strip()],
+            replica_max_lag_seconds=max_lag,
+            replica_check_interval_seconds=float(
+                os.getenv("DB_REPLICA_CHECK_INTERVAL_SECONDS", "2")),
+            replica_connect_timeout=int(os.getenv("DB_REPLICA_CONNECT_TIMEOUT", "2")),
+            read_your_writes_seconds=float(
+                os.getenv("DB_READ_YOUR_WRITES_SECONDS", str(max_lag))),
+            warm_connections=int(os.getenv("DB_WARM_CONNECTIONS", str(pool_size))),
+            precompile_statements=_flag("DB_PRECOMPILE_STATEMENTS", "true"),
+            create_partitions_on_startup=_flag("MAINTENANCE_PARTITIONS_ON_STARTUP", "false"),
+            sql_repeat_threshold=int(os.getenv("SQL_REPEAT_THRESHOLD", "10")),
+            response_compression=os.getenv("RESPONSE_COMPRESSION", "off").lower(),
+            response_compression_min_bytes=int(
+                os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024")),
+        )
+
+
+def async_url(url: str) -> str:
+    return url.replace("postgresql://", "postgresql+asyncpg://", 1) \
+        .replace("sqlite://", "sqlite+aiosqlite://", 1)
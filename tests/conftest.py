@@ -0,0 +1,146 @@
+"""
+Fixtures shared by the tests.
+
+Every test gets a fresh SQLite database by default. When TEST_DATABASE_URL
+points at an empty Postgres database, the tests run there instead, and the
+tests marked postgres are included. That database is migrated to head once
+and emptied before every test.
+"""
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from cache import InMemoryLRUBackend
+from orm import Base
+from settings import Settings
+
+# Handler tests send bursts of requests on purpose. Shedding has its own limits.
+# Set before any test module imports routes.admission, which reads it.
+os.environ.setdefault("ADMISSION_ENABLED", "false")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "")
+ON_POSTGRES = TEST_DATABASE_URL.startswith("postgresql")
+TABLES = ["car_garage", "garage_daily_bookings", "maintenances", "cars", "garages",
+          "maintenance_archives"]
+
+
+def pytest_collection_modifyitems(config, items):
+    if ON_POSTGRES:
+        return
+    skip = pytest.mark.skip(reason="needs TEST_DATABASE_URL pointing at Postgres")
+    for item in items:
+        if "postgres" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope="session")
+def migrated_postgres() -> str | None:
+    if not ON_POSTGRES:
+        return None
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "migrations"))
+    # migrations/env.py reads the URL through Settings.from_env().
+    previous = os.environ.get("DATABASE_URL")
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+    try:
+        command.upgrade(config, "head")
+    finally:
+        if previous is None:
+            del os.environ["DATABASE_URL"]
+        else:
+            os.environ["DATABASE_URL"] = previous
+    return TEST_DATABASE_URL
+
+
+@pytest.fixture
+def database_url(tmp_path, migrated_postgres) -> str:
+    if migrated_postgres:
+        engine = create_engine(migrated_postgres)
+        with engine.begin() as connection:
+            connection.execute(text(f"TRUNCATE {', '.join(TABLES)} "
+                                    "RESTART IDENTITY CASCADE"))
+        engine.dispose()
+        return migrated_postgres
+    url = f"sqlite:///{tmp_path / 'test.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    return url
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    from routes.entity_cache import entity_cache
+    from routes.report_cache import report_cache
+
+    entity_cache.backend = InMemoryLRUBackend(max_entries=10000, ttl_seconds=60)
+    report_cache.backend = InMemoryLRUBackend(report_cache.backend.max_entries,
+                                              report_cache.backend.ttl_seconds)
+
+
+@pytest.fixture
+def settings(database_url) -> Settings:
+    return Settings(database_url=database_url, precompile_statements=False)
+
+
+@pytest.fixture
+def client(settings):
+    from main import create_app
+
+    with TestClient(create_app(settings)) as client:
+        yield client
+
+
+@pytest.fixture
+def db(client):
+    """
+    A session on the database the client's app is configured for.
+    """
+    from orm.db_session import get_db_session
+
+    with get_db_session() as session:
+        yield session
+
+
+@pytest.fixture
+def make_garage(client):
+    def make_garage(capacity: int = 5, city: str = "Sofia", name: str = "Garage") -> dict:
+        response = client.post("/garages", json={"name": name, "location": "Main St 1",
+                                                 "city": city, "capacity": capacity})
+        assert response.status_code == 200, response.text
+        return response.json()
+    return make_garage
+
+
+@pytest.fixture
+def make_car(client):
+    plates = iter(range(1, 1_000_000))
+
+    def make_car(garage_ids: list[int] = (), make: str = "Toyota",
+                 model: str = "Corolla") -> dict:
+        response = client.post("/cars", json={
+            "make": make, "model": model, "productionYear": 2015,
+            "licensePlate": f"CA{next(plates):06d}", "garageIds": list(garage_ids),
+        })
+        assert response.status_code == 200, response.text
+        return response.json()
+    return make_car
+
+
+@pytest.fixture
+def make_maintenance(client):
+    def make_maintenance(car_id: int, garage_id: int, scheduled_date: str,
+                         service_type: str = "Oil change") -> dict:
+        response = client.post("/maintenance", json={
+            "carId": car_id, "garageId": garage_id, "serviceType": service_type,
+            "scheduledDate": scheduled_date,
+        })
+        assert response.status_code == 200, response.text
+        return response.json()
+    return make_maintenance
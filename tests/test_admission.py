@@ -0,0 +1,54 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from routes import admission
+from routes.admission import AdmissionRoute
+
+READ_SLOTS = 2
+
+
+@pytest.fixture
+def gated_app(monkeypatch):
+    """
+    Two lookup routes that block until released and a write route, behind
+    a read limiter with READ_SLOTS slots and no queue.
+    """
+    monkeypatch.setattr(admission, "ADMISSION_ENABLED", True)
+    monkeypatch.setattr(admission, "ADMISSION_READ_QUEUE", 0)
+    monkeypatch.setattr(admission, "limiters", {})
+    admission.configure_reads(admission.ADMISSION_WRITE_RESERVE + READ_SLOTS)
+
+    app = FastAPI()
+    app.router.route_class = AdmissionRoute
+    app.state.release = asyncio.Event()
+
+    async def wait():
+        await app.state.release.wait()
+        return {}
+
+    app.get("/first/{item_id}")(wait)
+    app.get("/second/{item_id}")(wait)
+    app.post("/write")(lambda: {})
+    return app
+
+
+async def _burst(app, paths: list[str]) -> tuple[list[int], int]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        reads = [asyncio.create_task(client.get(path)) for path in paths]
+        await asyncio.sleep(0.05)
+        write = await client.post("/write")
+        app.state.release.set()
+        return [response.status_code for response in await asyncio.gather(*reads)], \
+            write.status_code
+
+
+def test_reads_share_one_limit_across_routes(gated_app):
+    reads, write = asyncio.run(_burst(gated_app, ["/first/1", "/second/1", "/second/2"]))
+
+    assert sorted(reads) == [200] * READ_SLOTS + [503]
+    assert write == 200
+    assert admission.limiters[admission.READS].shed["queueFull"] == 1
@@ -0,0 +1,70 @@
+import pytest
+
+from routes.garages import MAX_MATRIX_DAYS
+
+START = "2030-03-01"
+END = "2030-03-03"
+
+
+def _matrix(client, city: str, start: str = START, end: str = END):
+    return client.get("/garages/availabilityMatrix",
+                      params={"city": city, "startDate": start, "endDate": end})
+
+
+def test_garages_without_bookings_are_fully_available(client, make_garage):
+    garage = make_garage(capacity=4, city="Varna")
+
+    response = _matrix(client, "Varna")
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {
+        "dates": ["2030-03-01", "2030-03-02", "2030-03-03"],
+        "garages": [{
+            "id": garage["id"], "name": garage["name"], "capacity": 4,
+            "requests": [0, 0, 0], "availableCapacity": [4, 4, 4],
+        }],
+    }
+
+
+def test_bookings_count_up_to_the_last_day_of_the_range(client, make_garage, make_car,
+                                                        make_maintenance):
+    busy = make_garage(capacity=2, city="Varna", name="Busy")
+    idle = make_garage(capacity=3, city="Varna", name="Idle")
+    car = make_car([busy["id"]])
+    for day in ["2030-03-01", "2030-03-03", "2030-03-03", "2030-03-04"]:
+        make_maintenance(car["id"], busy["id"], day)
+
+    garages = _matrix(client, "Varna").json()["garages"]
+
+    assert [(row["id"], row["requests"], row["availableCapacity"]) for row in garages] == [
+        (busy["id"], [1, 0, 2], [1, 2, 0]),
+        (idle["id"], [0, 0, 0], [3, 3, 3]),
+    ]
+
+
+def test_city_matches_whole_name_ignoring_case(client, make_garage):
+    varna = make_garage(city="Varna")
+    make_garage(city="Sofia")
+    make_garage(city="Varna Beach")
+
+    assert [row["id"] for row in _matrix(client, "vARNA").json()["garages"]] == \
+        [varna["id"]]
+    # LIKE wildcards in the city are matched literally.
+    for pattern in ["V%", "Varn_", "%"]:
+        assert _matrix(client, pattern).json()["garages"] == []
+
+
+@pytest.mark.parametrize("end, status", [
+    ("2031-02-28", 200),  # 365 days
+    ("2031-03-01", 200),  # MAX_MATRIX_DAYS
+    ("2031-03-02", 400),
+])
+def test_range_is_capped(client, make_garage, end, status):
+    make_garage(city="Varna")
+
+    response = _matrix(client, "Varna", end=end)
+
+    assert response.status_code == status, response.text
+    if status == 200:
+        assert len(response.json()["dates"]) <= MAX_MATRIX_DAYS
+        assert response.json()["dates"][-1] == end
@@ -0,0 +1,214 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import httpx
+from sqlalchemy import select
+
+from orm import CarGarageAssociations, GarageDailyBookings, Maintenances
+from orm.booking_rollup import reserve_booking
+from orm.db_session import get_db_session
+from routes.maintenances import FULLY_BOOKED
+
+CAPACITY = 3
+ATTEMPTS = 12
+DAY = date(2030, 1, 7)
+
+
+def _booked(db, garage_id: int, day: date = DAY) -> tuple[int, int]:
+    """
+    (rollup counter, maintenance rows) for one garage and day.
+    """
+    db.expire_all()
+    counter = db.scalar(select(GarageDailyBookings.requests).where(
+        GarageDailyBookings.garage_id == garage_id, GarageDailyBookings.day == day
+    ))
+    rows = len(db.scalars(select(Maintenances.maintenance_id).where(
+        Maintenances.garage_id == garage_id, Maintenances.scheduled_date == day
+    )).all())
+    return counter or 0, rows
+
+
+def test_parallel_reservations_never_exceed_capacity(db, make_garage):
+    garage = make_garage(capacity=CAPACITY)
+    ready = threading.Barrier(ATTEMPTS)
+
+    def reserve(_):
+        with get_db_session() as session:
+            ready.wait()
+            return reserve_booking(session, garage["id"], DAY)
+
+    with ThreadPoolExecutor(ATTEMPTS) as pool:
+        results = list(pool.map(reserve, range(ATTEMPTS)))
+
+    assert results.count(True) == CAPACITY
+    assert _booked(db, garage["id"])[0] == CAPACITY
+
+
+async def _post_all(app, path: str, payloads: list) -> list[httpx.Response]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(client.post(path, json=payload)
+                                      for payload in payloads))
+
+
+def test_parallel_bookings_never_exceed_capacity(client, db, make_garage, make_car):
+    garage = make_garage(capacity=CAPACITY)
+    car = make_car([garage["id"]])
+    payload = {"carId": car["id"], "garageId": garage["id"],
+               "serviceType": "Oil change", "scheduledDate": DAY.isoformat()}
+
+    responses = asyncio.run(_post_all(client.app, "/maintenance", [payload] * ATTEMPTS))
+
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses == [200] * CAPACITY + [409] * (ATTEMPTS - CAPACITY)
+    assert _booked(db, garage["id"]) == (CAPACITY, CAPACITY)
+
+
+def test_other_garages_keep_their_own_capacity(client, db, make_garage, make_car):
+    garages = [make_garage(capacity=CAPACITY) for _ in range(2)]
+    car = make_car([garage["id"] for garage in garages])
+    payloads = [{"carId": car["id"], "garageId": garage["id"],
+                 "serviceType": "Oil change", "scheduledDate": DAY.isoformat()}
+                for garage in garages for _ in range(CAPACITY)]
+
+    responses = asyncio.run(_post_all(client.app, "/maintenance", payloads))
+
+    assert all(response.status_code == 200 for response in responses)
+    assert [_booked(db, garage["id"]) for garage in garages] == \
+        [(CAPACITY, CAPACITY)] * 2
+
+
+def test_bulk_fills_a_day_up_to_capacity_in_payload_order(client, db, make_garage,
+                                                          make_car, make_maintenance):
+    garage = make_garage(capacity=CAPACITY)
+    car = make_car([garage["id"]])
+    make_maintenance(car["id"], garage["id"], DAY.isoformat())
+    payload = [{"carId": car["id"], "garageId": garage["id"],
+                "serviceType": f"Service {index}", "scheduledDate": DAY.isoformat()}
+               for index in range(4)]
+
+    response = client.post("/maintenance/bulk", json=payload)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [item["serviceType"] for item in body["created"]] == ["Service 0", "Service 1"]
+    assert body["errors"] == [{"index": index, "detail": FULLY_BOOKED} for index in (2, 3)]
+    assert _booked(db, garage["id"]) == (CAPACITY, CAPACITY)
+
+
+def test_parallel_bulk_bookings_in_opposite_orders(client, db, make_garage, make_car):
+    garages = [make_garage(capacity=CAPACITY) for _ in range(2)]
+    car = make_car([garage["id"] for garage in garages])
+    days = [DAY, date(2030, 1, 8)]
+    slots = [(garage["id"], day) for garage in garages for day in days]
+    payloads = [[{"carId": car["id"], "garageId": garage_id, "serviceType": "Oil change",
+                  "scheduledDate": day.isoformat()}
+                 for garage_id, day in (slots if attempt % 2 else slots[::-1])]
+                for attempt in range(ATTEMPTS)]
+
+    responses = asyncio.run(_post_all(client.app, "/maintenance/bulk", payloads))
+
+    assert all(response.status_code == 200 for response in responses)
+    assert sum(len(response.json()["created"]) for response in responses) == \
+        CAPACITY * len(slots)
+    for garage_id, day in slots:
+        assert _booked(db, garage_id, day) == (CAPACITY, CAPACITY)
+
+
+async def _put_all(app, requests: list[tuple[str, dict]]) -> list[httpx.Response]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(client.put(path, json=payload)
+                                      for path, payload in requests))
+
+
+def test_parallel_opposite_moves(client, db, make_garage, make_car, make_maintenance):
+    garage = make_garage(capacity=ATTEMPTS)
+    car = make_car([garage["id"]])
+    days = [DAY, date(2030, 1, 8)]
+    pairs = ATTEMPTS // 2
+    moves = []
+    for from_day, to_day in (days, days[::-1]):
+        for _ in range(pairs):
+            maintenance = make_maintenance(car["id"], garage["id"], from_day.isoformat())
+            moves.append((f"/maintenance/{maintenance['id']}", {
+                "carId": car["id"], "garageId": garage["id"],
+                "serviceType": "Oil change", "scheduledDate": to_day.isoformat(),
+            }))
+
+    responses = asyncio.run(_put_all(client.app, moves))
+
+    assert all(response.status_code == 200 for response in responses)
+    for day in days:
+        assert _booked(db, garage["id"], day) == (pairs, pairs)
+
+
+async def _delete_all(app, paths: list[str]) -> list[httpx.Response]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(client.delete(path) for path in paths))
+
+
+def test_parallel_deletes_release_the_day_once(client, db, make_garage, make_car,
+                                               make_maintenance):
+    garage = make_garage(capacity=CAPACITY)
+    car = make_car([garage["id"]])
+    kept = make_maintenance(car["id"], garage["id"], DAY.isoformat())
+    deleted = make_maintenance(car["id"], garage["id"], DAY.isoformat())
+
+    responses = asyncio.run(_delete_all(client.app, [f"/maintenance/{deleted['id']}"]
+                                        * ATTEMPTS))
+
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses == [200] + [404] * (ATTEMPTS - 1)
+    assert _booked(db, garage["id"]) == (1, 1)
+    assert client.get(f"/maintenance/{kept['id']}").status_code == 200
+
+
+def test_parallel_moves_of_one_maintenance(client, db, make_garage, make_car,
+                                           make_maintenance):
+    garage = make_garage(capacity=ATTEMPTS)
+    car = make_car([garage["id"]])
+    maintenance = make_maintenance(car["id"], garage["id"], DAY.isoformat())
+    days = [date(2030, 1, 8 + index) for index in range(ATTEMPTS)]
+
+    responses = asyncio.run(_put_all(client.app, [
+        (f"/maintenance/{maintenance['id']}", {
+            "carId": car["id"], "garageId": garage["id"],
+            "serviceType": "Oil change", "scheduledDate": day.isoformat(),
+        })
+        for day in days
+    ]))
+
+    # Without row locks (SQLite) a move that lost the race is refused instead.
+    assert {response.status_code for response in responses} <= {200, 409}
+    assert 200 in {response.status_code for response in responses}
+    final = date.fromisoformat(client.get(f"/maintenance/{maintenance['id']}")
+                               .json()["scheduledDate"][:10])
+    assert [_booked(db, garage["id"], day) for day in [DAY] + days] == \
+        [(1, 1) if day == final else (0, 0) for day in [DAY] + days]
+
+
+def test_parallel_updates_of_one_car(client, db, make_garage, make_car):
+    garages = [make_garage() for _ in range(ATTEMPTS)]
+    car = make_car([garages[0]["id"]])
+
+    responses = asyncio.run(_put_all(client.app, [
+        (f"/cars/{car['id']}", {
+            "make": "Toyota", "model": "Corolla", "productionYear": 2015,
+            "licensePlate": car["licensePlate"], "garageIds": [garage["id"]],
+        })
+        for garage in garages
+    ]))
+
+    # Without row locks (SQLite) an update that lost the race is refused instead.
+    assert {response.status_code for response in responses} <= {200, 409}
+    assert 200 in {response.status_code for response in responses}
+    db.expire_all()
+    links = db.scalars(select(CarGarageAssociations.garage_id)
+                       .where(CarGarageAssociations.car_id == car["id"])).all()
+    assert len(links) == 1
+    assert [garage["id"] for garage in client.get(f"/cars/{car['id']}").json()["garages"]] \
+        == links
@@ -0,0 +1,44 @@
+import pytest
+
+pytestmark = pytest.mark.postgres
+
+
+@pytest.fixture
+def cars(make_car):
+    return {
+        name: make_car(make=make, model=model)["id"]
+        for name, make, model in [
+            ("corolla", "Toyota", "Corolla"),
+            ("yaris", "Toyota", "Yaris"),
+            ("golf", "Volkswagen", "Golf"),
+            ("corsa", "Opel", "Corsa"),
+        ]
+    }
+
+
+def _search(client, q: str, **params) -> list[int]:
+    response = client.get("/cars/search", params={"q": q, **params})
+    assert response.status_code == 200, response.text
+    return [car["id"] for car in response.json()]
+
+
+def test_closest_word_match_ranks_first(client, cars):
+    assert _search(client, "toyota cor") == [cars["corolla"], cars["yaris"]]
+    assert _search(client, "Corola") == [cars["corolla"]]
+
+
+def test_equal_ranks_are_ordered_by_id(client, cars):
+    assert _search(client, "toyota") == [cars["corolla"], cars["yaris"]]
+
+
+def test_license_plate_prefix_matches(client, cars):
+    # make_car hands out plates CA000001, CA000002, ... in creation order; the
+    # other plates share most trigrams with the term and tie behind it.
+    assert _search(client, "ca000003") == [cars["golf"], cars["corolla"], cars["yaris"],
+                                           cars["corsa"]]
+
+
+def test_offset_and_limit_page_through_the_ranking(client, cars):
+    ranking = _search(client, "toyota cor")
+    assert _search(client, "toyota cor", limit=1) == ranking[:1]
+    assert _search(client, "toyota cor", offset=1) == ranking[1:]
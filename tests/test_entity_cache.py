@@ -0,0 +1,92 @@
+import logging
+
+from sqlalchemy import delete
+
+from orm import CarGarageAssociations, Cars, Garages
+from routes.buisness_validators import EntityLoader
+from routes.entity_cache import entity_cache
+
+
+def test_bookings_check_references_against_the_database(client, db, make_garage, make_car):
+    garages = [make_garage()["id"] for _ in range(2)]
+    car = make_car(garages)
+    assert client.get(f"/cars/{car['id']}").status_code == 200
+    assert client.get(f"/garages/{garages[1]}").status_code == 200
+
+    # Deleted through another worker, whose invalidation never reached this one.
+    db.execute(delete(CarGarageAssociations).where(
+        CarGarageAssociations.garage_id == garages[1]))
+    db.execute(delete(Garages).where(Garages.garage_id == garages[1]))
+    db.commit()
+    booking = {"carId": car["id"], "garageId": garages[1],
+               "serviceType": "Oil change", "scheduledDate": "2030-01-07"}
+
+    assert client.post("/maintenance", json=booking).status_code == 404
+
+    created = client.post("/maintenance", json=booking | {"garageId": garages[0]}).json()
+    other_car = make_car([garages[0]])
+    assert client.get(f"/cars/{other_car['id']}").status_code == 200
+    db.execute(delete(CarGarageAssociations).where(
+        CarGarageAssociations.car_id == other_car["id"]))
+    db.execute(delete(Cars).where(Cars.car_id == other_car["id"]))
+    db.commit()
+
+    assert client.put(f"/maintenance/{created['id']}", json=booking | {
+        "carId": other_car["id"], "garageId": garages[0],
+    }).status_code == 404
+
+
+def test_load_racing_an_invalidation_is_not_cached(client, db, make_garage, make_car,
+                                                   monkeypatch):
+    garage = make_garage()
+    car = make_car([garage["id"]])
+    load_car = EntityLoader.car
+
+    def car_changed_while_loading(loader, car_id):
+        loaded = load_car(loader, car_id)
+        entity_cache.invalidate_car(car_id)
+        return loaded
+
+    monkeypatch.setattr(EntityLoader, "car", car_changed_while_loading)
+    entity_cache.get_car(car["id"], db, with_garages=False)
+
+    assert entity_cache.backend.get(f"car:{car['id']}") is None
+    assert entity_cache.backend.get(f"garage:{garage['id']}") is None
+
+    monkeypatch.setattr(EntityLoader, "car", load_car)
+    entity_cache.get_car(car["id"], db, with_garages=False)
+
+    assert entity_cache.backend.get(f"car:{car['id']}") is not None
+
+
+def test_invalidation_while_storing_is_not_cached(client, db, make_garage, monkeypatch):
+    garage = make_garage()
+    backend = entity_cache.backend
+    store = backend.set
+
+    def invalidated_while_storing(key, value):
+        # Cache I/O, over the network with Redis, runs without the cache's lock.
+        assert not entity_cache._lock.locked()
+        store(key, value)
+        entity_cache.invalidate_garage(garage["id"])
+
+    monkeypatch.setattr(backend, "set", invalidated_while_storing)
+    entity_cache.get_garage(garage["id"], db)
+
+    assert backend.get(f"garage:{garage['id']}") is None
+
+
+def test_server_warns_about_a_per_worker_cache(monkeypatch, caplog):
+    from server import warn_about_process_local_caches
+
+    monkeypatch.delenv("ENTITY_CACHE_BACKEND", raising=False)
+    with caplog.at_level(logging.WARNING, logger="server"):
+        warn_about_process_local_caches(1)
+        assert not caplog.records
+        warn_about_process_local_caches(4)
+        assert "ENTITY_CACHE_BACKEND=memory" in caplog.text
+
+        caplog.clear()
+        monkeypatch.setenv("ENTITY_CACHE_BACKEND", "redis")
+        warn_about_process_local_caches(4)
+        assert not caplog.records
@@ -0,0 +1,51 @@
+from dataclasses import replace
+
+import pytest
+
+from orm import db_session
+from routes import maintenances
+
+
+@pytest.fixture
+def fleet(make_garage, make_car, make_maintenance):
+    garage = make_garage(capacity=10)
+    for index in range(5):
+        car = make_car([garage["id"]], model=f"Model {index}")
+        make_maintenance(car["id"], garage["id"], f"2030-04-{index % 3 + 1:02d}")
+
+
+@pytest.fixture
+def async_mode(client, settings, monkeypatch):
+    """
+    Switches the export to DB_MODE=async on the running app; returns the
+    async sessions it opens.
+    """
+    opened = []
+
+    def open_session(**kwargs):
+        opened.append(kwargs)
+        return db_session.get_async_db_session(**kwargs)
+
+    def switch():
+        monkeypatch.setattr(db_session, "DB_MODE", "async")
+        monkeypatch.setattr(maintenances, "DB_MODE", "async")
+        monkeypatch.setattr(maintenances, "get_async_db_session", open_session)
+        client.portal.call(db_session.dispose)
+        db_session.configure(replace(settings, db_mode="async"))
+        return opened
+    return switch
+
+
+@pytest.mark.parametrize("export_format", ["ndjson", "csv"])
+def test_async_export_streams_the_same_rows(client, fleet, async_mode, monkeypatch,
+                                            export_format):
+    monkeypatch.setattr(maintenances, "EXPORT_BATCH_SIZE", 2)
+    params = {"format": export_format, "startDate": "2030-04-01"}
+    streamed = client.get("/maintenance/export", params=params)
+    opened = async_mode()
+    streamed_async = client.get("/maintenance/export", params=params)
+
+    assert streamed.status_code == streamed_async.status_code == 200
+    assert opened == [{"read_only": True}]
+    assert streamed_async.content == streamed.content
+    assert streamed.content.count(b"Model") == 5
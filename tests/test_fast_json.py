@@ -0,0 +1,62 @@
+import pytest
+from fastapi.responses import JSONResponse
+
+from routes import cars, garages, maintenances
+from routes import fast_json
+from routes.fast_json import FastJSONResponse
+
+LIST_PATHS = ["/cars", "/garages", "/maintenance"]
+
+
+@pytest.fixture
+def fleet(make_garage, make_car, make_maintenance):
+    """
+    Rows exercising the value formatting: non-ASCII text, escapes, cars
+    without garages and dates around a year end.
+    """
+    garage_ids = [make_garage(name="Сервиз \"Изток\"", city="София")["id"],
+                  make_garage(name="Garage\tNord", city="Zürich", capacity=1)["id"]]
+    for index, scheduled in enumerate(["2029-12-31", "2030-01-01", "2030-02-28"]):
+        car = make_car(garage_ids[:index], make="Škoda", model=f"Octavia {index}")
+        if index:
+            make_maintenance(car["id"], garage_ids[index - 1], scheduled,
+                             service_type="Смяна на масло ✓")
+
+
+@pytest.fixture
+def fast_json_mode(monkeypatch):
+    def set_mode(enabled: bool):
+        for module in (cars, garages, maintenances):
+            monkeypatch.setattr(module, "FAST_JSON", enabled)
+    return set_mode
+
+
+@pytest.mark.parametrize("path", LIST_PATHS)
+@pytest.mark.parametrize("limit", [1, 100])
+def test_fast_path_is_byte_identical(client, fleet, fast_json_mode, path, limit):
+    fast_json_mode(False)
+    stock = client.get(path, params={"limit": limit})
+    fast_json_mode(True)
+    fast = client.get(path, params={"limit": limit})
+
+    assert stock.status_code == fast.status_code == 200
+    assert fast.content == stock.content
+    assert fast.headers["content-type"] == stock.headers["content-type"]
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+@pytest.mark.parametrize("content", [
+    {"items": [], "nextCursor": None},
+    {"a": [1, [2, [3, None]], {"b": []}], "c": "ü \" \\ \n ✓", "d": -0.5, "e": True},
+    [None, "", 0, 1e20, 12345678901234567890],
+])
+def test_encoder_matches_the_stock_response(monkeypatch, use_orjson, content):
+    if use_orjson and fast_json.orjson is None:
+        pytest.skip("orjson is not installed")
+    if not use_orjson:
+        monkeypatch.setattr(fast_json, "orjson", None)
+    if use_orjson and isinstance(content, list):
+        # orjson only encodes 64-bit integers and writes floats in its own notation.
+        content = content[:3]
+
+    assert FastJSONResponse(content).body == JSONResponse(content).body
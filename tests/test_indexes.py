@@ -0,0 +1,121 @@
+import re
+from datetime import date
+
+import pytest
+from sqlalchemy import event, insert, text
+
+from orm import Maintenances
+
+pytestmark = pytest.mark.postgres
+
+INDEX_SCAN = re.compile(r"(?:Index (?:Only )?Scan(?: Backward)? using|Bitmap Index Scan on) "
+                        r"(\S+)")
+
+
+@pytest.fixture
+def indexes_used(client, db, make_garage, make_car, make_maintenance):
+    """
+    Calls a GET endpoint and returns the indexes in the plans of the SELECTs
+    it ran. The test tables are too small for the planner to prefer an index
+    on its own, so plans are made with sequential and plain index scans
+    disabled. An index then only shows up as a bitmap scan when it can serve
+    the filter, and not just the ORDER BY. With ordered=True plain index
+    scans stay enabled, to check an index that serves the ORDER BY.
+    """
+    from orm import db_session
+
+    garages = [make_garage(city=city)["id"] for city in ("Sofia", "Plovdiv")]
+    for index in range(4):
+        car = make_car(garages, make=("Toyota", "Skoda")[index % 2])
+        make_maintenance(car["id"], garages[index % 2], f"2030-02-{index + 1:02d}")
+    db.execute(text("ANALYZE"))
+
+    def indexes_used(path: str, ordered: bool = False, **params) -> set[str]:
+        executed = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                executed.append((statement, parameters))
+
+        event.listen(db_session.engine, "before_cursor_execute", record)
+        try:
+            response = client.get(path, params=params)
+        finally:
+            event.remove(db_session.engine, "before_cursor_execute", record)
+        assert response.status_code == 200, response.text
+
+        used = set()
+        with db_session.engine.begin() as connection:
+            connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+            if not ordered:
+                connection.exec_driver_sql("SET LOCAL enable_indexscan = off")
+            for statement, parameters in executed:
+                plan = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+                used.update(match[1] for line in plan.scalars()
+                            for match in INDEX_SCAN.finditer(line))
+        return used
+    return indexes_used
+
+
+def _uses(used: set[str], index: str) -> bool:
+    # Partitions of maintenances name their copy of an index after the
+    # partition and the columns, e.g. maintenances_2030_02_car_id_idx.
+    return any(name == index or name.endswith(index) for name in used)
+
+
+def test_maintenances_by_garage_and_date_use_the_composite_index(db, indexes_used):
+    # Enough rows of the other garage in the range that the garage is what
+    # makes an index selective.
+    db.execute(insert(Maintenances), [
+        {"car_id": 1, "garage_id": 2, "service_type": "Oil change",
+         "scheduled_date": date(2030, 2, index % 28 + 1)}
+        for index in range(500)
+    ])
+    db.execute(text("ANALYZE maintenances"))
+    db.commit()
+    used = indexes_used("/maintenance", garageId=1, startDate="2030-02-01",
+                        endDate="2030-02-28")
+    assert _uses(used, "garage_id_scheduled_date_idx") or \
+        _uses(used, "ix_maintenances_garage_id_scheduled_date")
+
+
+def test_maintenances_by_car_use_the_car_index(indexes_used):
+    used = indexes_used("/maintenance", carId=1)
+    assert _uses(used, "car_id_idx") or _uses(used, "ix_maintenances_car_id")
+
+
+@pytest.mark.parametrize("path", ["/maintenance", "/maintenance/export"])
+def test_unfiltered_maintenances_are_read_in_key_order(client, indexes_used, path):
+    first_page = client.get("/maintenance", params={"limit": 2}).json()
+    params = {"cursor": first_page["nextCursor"]} if path == "/maintenance" else {}
+    used = indexes_used(path, ordered=True, limit=2, **params)
+    assert _uses(used, "scheduled_date_maintenance_id_idx") or \
+        _uses(used, "ix_maintenances_scheduled_date_maintenance_id")
+
+
+def test_cars_by_garage_use_the_reverse_association_index(indexes_used):
+    assert _uses(indexes_used("/cars", garageId=1), "ix_car_garage_garage_id_car_id")
+
+
+def test_make_substring_filter_uses_the_trigram_index(indexes_used):
+    assert _uses(indexes_used("/cars", carMake="oyo"), "ix_cars_make_trgm")
+
+
+def test_car_search_ranks_on_the_gist_trigram_index(indexes_used):
+    # The nearest-neighbour scan serves the <<-> ORDER BY, not a filter.
+    assert _uses(indexes_used("/cars/search", ordered=True, q="toyota"),
+                 "ix_cars_search_trgm")
+
+
+def test_city_substring_filter_uses_the_trigram_index(indexes_used):
+    assert _uses(indexes_used("/garages", city="lovd"), "ix_garages_city_trgm")
+
+
+@pytest.mark.parametrize("path, params", [
+    ("/garages/dailyAvailabilityReport",
+     {"garageId": 1, "startDate": "2030-02-01", "endDate": "2030-02-28"}),
+    ("/maintenance/monthlyRequestsReport",
+     {"garageId": 1, "startMonth": "2030-01", "endMonth": "2030-03"}),
+])
+def test_reports_read_the_rollup_by_its_key(indexes_used, path, params):
+    assert _uses(indexes_used(path, **params), "garage_daily_bookings_pkey")
@@ -0,0 +1,26 @@
+from orm import db_session
+
+
+def _sample(client, name: str) -> float:
+    response = client.get("/metrics")
+    assert response.status_code == 200, response.text
+    return next(float(line.split()[1]) for line in response.text.splitlines()
+                if line.startswith(f"{name} "))
+
+
+def test_pool_gauges_are_read_when_scraped(client):
+    checked_out = _sample(client, "db_pool_checked_out")
+    waiters = _sample(client, "db_pool_waiters")
+
+    connection = db_session.active_pool().connect()
+    # A request queued on the exhausted pool: nothing is checked out or in.
+    db_session.pool_stats.start_wait()
+    try:
+        assert _sample(client, "db_pool_checked_out") == checked_out + 1
+        assert _sample(client, "db_pool_waiters") == waiters + 1
+    finally:
+        db_session.pool_stats.abort_wait()
+        connection.close()
+
+    assert _sample(client, "db_pool_checked_out") == checked_out
+    assert _sample(client, "db_pool_waiters") == waiters
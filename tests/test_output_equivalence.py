@@ -0,0 +1,75 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from orm import Garages, Maintenances
+
+FIELD_SUBSETS = {
+    "/cars": ["id", "make,model", "licensePlate,garages", "id,make,model,productionYear"],
+    "/garages": ["id", "name,city", "capacity,location"],
+    "/maintenance": ["id", "carName,garageName", "scheduledDate,serviceType",
+                     "carId,garageId,scheduledDate"],
+}
+
+
+@pytest.fixture
+def fleet(make_garage, make_car, make_maintenance) -> list[int]:
+    garages = [make_garage(capacity=2, city=city, name=f"Garage {city}")["id"]
+               for city in ("Sofia", "Plovdiv")]
+    for index in range(6):
+        car = make_car(garages[:index % 2 + 1], make=("Toyota", "Skoda")[index % 2])
+        make_maintenance(car["id"], garages[index % 2], f"2030-03-{index % 3 + 1:02d}")
+    return garages
+
+
+@pytest.mark.parametrize("path, fields", [
+    (path, fields) for path, subsets in FIELD_SUBSETS.items() for fields in subsets
+])
+def test_sparse_fields_match_the_full_representation(client, fleet, path, fields):
+    full = client.get(path, params={"limit": 3}).json()
+    sparse = client.get(path, params={"limit": 3, "fields": fields}).json()
+
+    wanted = fields.split(",")
+    assert sparse["items"] == [{field: item[field] for field in wanted}
+                               for item in full["items"]]
+    assert sparse["nextCursor"] == full["nextCursor"]
+
+
+def _daily_report_before_rollup(db, garage_id: int, start: date, end: date) -> list:
+    """
+    The report as get_garages_report computed it in Python before it moved to
+    SQL: every maintenance in range loaded and counted per day.
+    """
+    capacity = db.scalar(select(Garages.capacity).where(Garages.garage_id == garage_id))
+    requests_by_date = {}
+    for maintenance in db.scalars(select(Maintenances).where(
+            Maintenances.garage_id == garage_id,
+            Maintenances.scheduled_date >= start,
+            Maintenances.scheduled_date <= end)):
+        requests_by_date[maintenance.scheduled_date] = \
+            requests_by_date.get(maintenance.scheduled_date, 0) + 1
+    days = (end - start).days + 1
+    return [{
+        "date": str(start + timedelta(days=offset)),
+        "requests": requests_by_date.get(start + timedelta(days=offset), 0),
+        "availableCapacity": max(capacity - requests_by_date.get(
+            start + timedelta(days=offset), 0), 0),
+    } for offset in range(days)]
+
+
+@pytest.mark.postgres
+@pytest.mark.parametrize("start, end", [
+    ("2030-03-01", "2030-03-01"),
+    ("2030-02-27", "2030-03-04"),
+    ("2030-03-02", "2030-04-30"),
+])
+def test_daily_report_matches_the_per_row_computation(client, db, fleet, start, end):
+    for garage_id in fleet:
+        response = client.get("/garages/dailyAvailabilityReport", params={
+            "garageId": garage_id, "startDate": start, "endDate": end,
+        })
+        assert response.status_code == 200
+        assert response.json() == _daily_report_before_rollup(
+            db, garage_id, date.fromisoformat(start), date.fromisoformat(end)
+        )
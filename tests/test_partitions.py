@@ -0,0 +1,72 @@
+import csv
+import gzip
+import os
+from dataclasses import replace
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select, text
+
+from orm import GarageDailyBookings, Maintenances
+from orm.booking_rollup import rebuild, record_booking
+from orm.partitions import MONTHS_AHEAD, archive_partitions, archived_partitions, \
+    monthly_partitions
+
+pytestmark = pytest.mark.postgres
+
+
+def _partition_months_ahead(months: int) -> str:
+    month = date.today().month - 1 + months
+    return f"maintenances_{date.today().year + month // 12}_{month % 12 + 1:02d}"
+
+
+def _partitions(db) -> set[str]:
+    db.rollback()
+    return {name for name, _ in monthly_partitions(db)}
+
+
+def test_only_the_opted_in_lifespan_creates_partitions(settings, db):
+    from main import create_app
+
+    furthest = _partition_months_ahead(MONTHS_AHEAD)
+    db.execute(text(f'DROP TABLE IF EXISTS "{furthest}"'))
+    db.commit()
+
+    with TestClient(create_app(settings)):
+        pass
+    assert furthest not in _partitions(db)
+
+    with TestClient(create_app(replace(settings, create_partitions_on_startup=True))):
+        pass
+    assert furthest in _partitions(db)
+
+
+def test_archive_writes_the_file_before_dropping_the_partition(db, tmp_path, make_garage,
+                                                               make_car):
+    garage = make_garage()
+    car = make_car([garage["id"]])
+    day = date(2020, 1, 15)
+    db.execute(text("SELECT create_maintenance_partitions('2020-01-01', 1)"))
+    db.add(Maintenances(car_id=car["id"], garage_id=garage["id"],
+                        service_type="Oil change", scheduled_date=day))
+    record_booking(db, garage["id"], day, 1)
+    db.commit()
+
+    archived = archive_partitions(db, date(2020, 2, 1), str(tmp_path))
+
+    assert archived == [str(tmp_path / "maintenances_2020_01.csv.gz")]
+    assert os.listdir(tmp_path) == ["maintenances_2020_01.csv.gz"]
+    with gzip.open(archived[0], "rt", newline="") as file:
+        rows = list(csv.DictReader(file))
+    assert [(row["garage_id"], row["scheduled_date"]) for row in rows] == \
+        [(str(garage["id"]), day.isoformat())]
+    assert "maintenances_2020_01" not in _partitions(db)
+    assert archived_partitions(db) == ["maintenances_2020_01"]
+
+    with pytest.raises(RuntimeError, match="archived"):
+        rebuild(db)
+    db.rollback()
+    assert db.scalar(select(GarageDailyBookings.requests).where(
+        GarageDailyBookings.garage_id == garage["id"], GarageDailyBookings.day == day
+    )) == 1
@@ -0,0 +1,62 @@
+import re
+
+import pytest
+
+SMALL, LARGE = 2, 25
+
+
+def _statements(response) -> int:
+    """
+    SQL statements the request executed, from the Server-Timing header set by
+    QueryStatsMiddleware.
+    """
+    assert response.status_code == 200, response.text
+    return int(re.search(r'desc="(\d+) queries"', response.headers["Server-Timing"])[1])
+
+
+@pytest.fixture
+def fleet(make_garage, make_car, make_maintenance):
+    """
+    Adds cars with two garages and a maintenance each; returns the garage ids.
+    """
+    garages = [make_garage()["id"] for _ in range(2)]
+
+    def add(count: int):
+        for index in range(count):
+            car = make_car(garages)
+            make_maintenance(car["id"], garages[index % 2], f"2030-02-{index % 28 + 1:02d}")
+    add.garages = garages
+    return add
+
+
+@pytest.mark.parametrize("path, fields", [
+    ("/cars", None),
+    ("/cars", "id,make,garages"),
+    ("/garages", None),
+    ("/maintenance", None),
+    ("/maintenance", "id,carName,garageName"),
+])
+def test_list_statement_count_does_not_grow_with_rows(client, fleet, path, fields):
+    params = {"limit": 100} | ({"fields": fields} if fields else {})
+    fleet(SMALL)
+    few = _statements(client.get(path, params=params))
+    fleet(LARGE - SMALL)
+    many = _statements(client.get(path, params=params))
+
+    assert few == many <= 3
+
+
+def test_car_statement_count_does_not_grow_with_garages(client, make_garage):
+    counts = []
+    for garage_count in (1, 10):
+        garage_ids = [make_garage()["id"] for _ in range(garage_count)]
+        car = {"make": "Toyota", "model": "Corolla", "productionYear": 2015,
+               "licensePlate": f"CB{garage_count:06d}", "garageIds": garage_ids}
+        created = client.post("/cars", json=car)
+        car_id = created.json()["id"]
+        updated = client.put(f"/cars/{car_id}", json=car | {"model": "Auris"})
+        fetched = client.get(f"/cars/{car_id}")
+        assert len(fetched.json()["garages"]) == garage_count
+        counts.append([_statements(response) for response in (created, updated, fetched)])
+
+    assert counts[0] == counts[1]
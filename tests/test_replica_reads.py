@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from orm import Base, Garages
+from settings import Settings
+
+
+@pytest.fixture
+def replica(tmp_path):
+    """
+    A replica that never replays anything: it keeps the rows it was given.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def settings(database_url, replica) -> Settings:
+    return Settings(database_url=database_url, precompile_statements=False,
+                    replica_urls=[replica.url.render_as_string(hide_password=False)])
+
+
+@pytest.fixture
+def stale_garage(client, replica, make_garage) -> dict:
+    garage = make_garage(name="Current")
+    with Session(replica) as session:
+        session.add(Garages(garage_id=garage["id"], name="Stale", location="Old St 1",
+                            city=garage["city"], capacity=garage["capacity"]))
+        session.commit()
+    # Drop the read-your-writes cookie the POST set.
+    client.cookies.clear()
+    return garage
+
+
+def test_lists_read_from_the_replica(client, stale_garage):
+    names = [item["name"] for item in client.get("/garages").json()["items"]]
+    assert names == ["Stale"]
+
+
+def test_entity_cache_is_filled_from_the_primary(client, stale_garage):
+    path = f"/garages/{stale_garage['id']}"
+    assert client.get(path).json()["name"] == "Current"
+
+    renamed = stale_garage | {"name": "Renamed"}
+    del renamed["id"]
+    assert client.put(path, json=renamed).status_code == 200
+    client.cookies.clear()
+
+    assert client.get(path).json()["name"] == "Renamed"
+
+
+def test_report_cache_is_filled_from_the_primary(client, stale_garage, make_car,
+                                                 make_maintenance):
+    car = make_car([stale_garage["id"]])
+    make_maintenance(car["id"], stale_garage["id"], "2030-02-03")
+    client.cookies.clear()
+
+    report = client.get("/maintenance/monthlyRequestsReport", params={
+        "garageId": stale_garage["id"], "startMonth": "2030-02", "endMonth": "2030-02",
+    })
+
+    assert report.status_code == 200
+    assert [month["requests"] for month in report.json()] == [1]
@@ -0,0 +1,109 @@
+import asyncio
+import json
+import threading
+
+from cache import InMemoryLRUBackend
+from routes.report_cache import CachedResponse, ReportCache
+
+
+class JSONBackend(InMemoryLRUBackend):
+    """
+    Keeps entries as JSON text, the way the Redis backend does.
+    """
+
+    def get(self, key: str):
+        raw = super().get(key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value):
+        super().set(key, json.dumps(value))
+
+
+def _cache() -> ReportCache:
+    cache = ReportCache(ttl_seconds=5, max_entries=10)
+    cache.backend = JSONBackend(10, 5)
+    return cache
+
+
+async def _serve_twice(cache: ReportCache, response: CachedResponse):
+    """
+    Serves one key from two requests, the second arriving while the first
+    computes; returns what each got.
+    """
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def compute():
+        started.set()
+        await release.wait()
+        return response
+
+    first = asyncio.create_task(cache.serve("report", compute))
+    await started.wait()
+    second = asyncio.create_task(cache.serve("report", compute))
+    await asyncio.sleep(0)
+    release.set()
+    return await first, await second
+
+
+def test_successful_reports_are_shared_and_cached_as_json():
+    cache = _cache()
+    body = b'[{"month": "2030-01", "requests": 1}]' + bytes(range(256))
+    response = CachedResponse(200, [(b"content-type", b"application/json"),
+                                    (b"x-name", "Изток".encode())], body)
+
+    first, second = asyncio.run(_serve_twice(cache, response))
+    cached = asyncio.run(cache.serve("report", None))
+
+    assert first is second is response
+    assert (cached.status, cached.headers, cached.body) == \
+        (response.status, response.headers, response.body)
+    assert (cache.misses, cache.coalesced, cache.hits) == (1, 1, 1)
+
+
+def test_failed_reports_are_neither_shared_nor_cached():
+    cache = _cache()
+    shed = CachedResponse(503, [(b"retry-after", b"1")], b'{"detail": "overloaded"}')
+
+    first, second = asyncio.run(_serve_twice(cache, shed))
+
+    assert first is shed
+    assert second is None
+    assert cache.backend.get("report") is None
+
+
+class RecordingBackend(JSONBackend):
+    """
+    A network-backed stand-in that records the threads it is called on.
+    """
+
+    blocking = True
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.threads = []
+
+    def get(self, key: str):
+        self.threads.append(threading.get_ident())
+        return super().get(key)
+
+    def set(self, key: str, value):
+        self.threads.append(threading.get_ident())
+        super().set(key, value)
+
+
+def test_blocking_backends_are_called_off_the_event_loop():
+    cache = _cache()
+    cache.backend = RecordingBackend(10, 5)
+    response = CachedResponse(200, [], b"[]")
+
+    async def serve_twice():
+        async def compute():
+            return response
+        await cache.serve("report", compute)
+        return await cache.serve("report", None), threading.get_ident()
+
+    cached, loop_thread = asyncio.run(serve_twice())
+
+    assert cached.body == b"[]"
+    assert len(cache.backend.threads) == 3
+    assert loop_thread not in cache.backend.threads
@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+
+from tests.conftest import ROOT
+
+
+def _value_class_after_prepare(metrics_dir: str, workers: int) -> str:
+    # prometheus_client picks its value class when it is first imported.
+    check = (f"import server; server.prepare_metrics_directory({workers}); "
+             "import prometheus_client.values as values; "
+             "print(values.ValueClass.__name__)")
+    return subprocess.run(
+        [sys.executable, "-c", check], cwd=ROOT, check=True, capture_output=True,
+        text=True, env=os.environ | {"PROMETHEUS_MULTIPROC_DIR": metrics_dir},
+    ).stdout.strip()
+
+
+def test_one_worker_keeps_per_value_locks(tmp_path):
+    assert _value_class_after_prepare(str(tmp_path / "metrics"), 1) == "MutexValue"
+
+
+def test_several_workers_share_an_emptied_directory(tmp_path):
+    metrics_dir = tmp_path / "metrics"
+    metrics_dir.mkdir()
+    (metrics_dir / "counter_1.db").write_bytes(b"stale")
+
+    assert _value_class_after_prepare(str(metrics_dir), 4) == "MmapedValue"
+    assert os.listdir(metrics_dir) == []
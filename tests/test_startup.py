@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+
+from tests.conftest import ROOT
+
+
+def test_importing_main_builds_no_app():
+    # Servers build the app through create_app(); importing main must stay
+    # cheap and leave the routers and the ORM unimported.
+    check = ("import sys, main; "
+             "assert '_app' in vars(main) and main._app is None; "
+             "assert not {'routes', 'orm', 'metrics'} & set(sys.modules), sorted(sys.modules)")
+    subprocess.run([sys.executable, "-c", check], cwd=ROOT, check=True)
+
+
+def test_main_app_is_built_once_on_first_access(tmp_path):
+    # uvicorn main:app resolves the attribute, which builds the app lazily.
+    check = ("import sys, main, fastapi; "
+             "app = main.app; "
+             "assert isinstance(app, fastapi.FastAPI) and main.app is app; "
+             "assert 'routes' in sys.modules")
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'startup.db'}")
+    subprocess.run([sys.executable, "-c", check], cwd=ROOT, env=env, check=True)
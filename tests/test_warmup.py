@@ -0,0 +1,22 @@
+from sqlalchemy import event
+
+from routes.warmup import precompile_statements
+
+
+def test_warmup_runs_the_report_queries(db):
+    from orm import db_session
+
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(db_session.engine, "before_cursor_execute", record)
+    try:
+        precompile_statements(db)
+    finally:
+        event.remove(db_session.engine, "before_cursor_execute", record)
+
+    assert any("generate_series" in statement for statement in executed)
+    assert any("garage_daily_bookings" in statement and "GROUP BY" in statement
+               for statement in executed)